@@ -2,172 +2,53 @@
 # This program is licensed under the GNU AGPLv3. See LICENSE for details.
 # Source code: https://github.com/VanilleIce/ProjectLyrica_Linux
 
-import json
 import time
-import os
-import sys
-import psutil
-import platform
-import subprocess
-import threading
-from pathlib import Path
-from threading import Event, Thread, Timer, Lock
-from pynput.keyboard import Controller, Listener
-import tkinter as tk
-from tkinter import filedialog, messagebox
-import xml.etree.ElementTree as ET
-import webbrowser
-from update_checker import check_update
-
-try:
-    from Xlib import display, X
-    X11_AVAILABLE = True
-except ImportError:
-    X11_AVAILABLE = False
-
-SETTINGS_FILE = os.path.join(os.path.expanduser("~"), ".config", "ProjectLyrica", "settings.json")
-DEFAULT_WINDOW_SIZE = (400, 280)
-EXPANDED_SIZE = (400, 380)
-FULL_SIZE = (400, 470)
-version = "1.0.1"
-
-# -------------------------------
-# Language Manager Class
-# -------------------------------
-
-class LM:
-    _translations_cache = {}
-    _selected_language = None
-    _available_languages = []
-
-    @classmethod
-    def initialize(cls):
-        cls._selected_language = ConfigManager.load_config().get("selected_language")
-        cls._available_languages = cls.load_available_languages()
-
-    @staticmethod
-    def load_available_languages():
-        lang_file = os.path.join('resources', 'config', 'lang.xml')
-        try:
-            tree = ET.parse(lang_file)
-            languages = []
-            for lang in tree.findall('language'):
-                code = lang.get('code')
-                text = lang.text
-                key_layout = lang.get('key_layout', 'QWERTY')
-                if code and text:
-                    languages.append((code, text, key_layout))
-            return languages
-        except Exception as e:
-            messagebox.showerror("Error", f"Error loading languages: {e}")
-            return []
-
-    @classmethod
-    def load_translations(cls, language_code):
-        if language_code in cls._translations_cache:
-            return cls._translations_cache[language_code]
-
-        lang_file = os.path.join('resources', 'lang', f"{language_code}.xml")
-        try:
-            tree = ET.parse(lang_file)
-            translations = {t.get('key'): t.text for t in tree.findall('translation') 
-                          if t.get('key') and t.text}
-            cls._translations_cache[language_code] = translations
-            return translations
-        except FileNotFoundError:
-            if language_code != 'en_US':
-                return cls.load_translations('en_US')
-            return {}
-        except Exception as e:
-            messagebox.showerror("Error", f"Error loading translations: {e}")
-            return {}
 
-    @classmethod
-    def get_translation(cls, key):
-        translations = cls.load_translations(cls._selected_language or 'en_US')
-        return translations.get(key, f"[{key}]")
+_start_time = time.perf_counter()
 
-    @classmethod
-    def save_language(cls, language_code):
-        cls._selected_language = language_code
-        config = ConfigManager.load_config()
-        
-        layout_name = "QWERTY"
-        for code, name, key_layout in cls._available_languages:
-            if code == language_code:
-                layout_name = key_layout
-                break
-        
-        try:
-            layout_mapping = KeyboardLayoutManager.load_layout(layout_name)
-        except Exception as e:
-            messagebox.showerror("Error", f"Error loading layout: {e}")
-            layout_mapping = config.get("key_mapping", {})
-
-        ConfigManager.save_config({
-            "selected_language": language_code,
-            "keyboard_layout": layout_name,
-            "key_mapping": layout_mapping
-        })
-
-# -------------------------------
-# Config Manager
-# -------------------------------
-
-class ConfigManager:
-    DEFAULT_CONFIG = {
-        "key_press_durations": [0.2, 0.248, 0.3, 0.5, 1.0],
-        "speed_presets": [600, 800, 1000, 1200],
-        "selected_language": None,
-        "keyboard_layout": "QWERTZ",
-        "key_mapping": {
-            "Key0": "z", "Key1": "u", "Key2": "i", "Key3": "o",
-            "Key4": "p", "Key5": "h", "Key6": "j", "Key7": "k",
-            "Key8": "l", "Key9": "ö", "Key10": "n", "Key11": "m",
-            "Key12": ",", "Key13": ".", "Key14": "-"
-        },
-        "timing_config": {
-            "initial_delay": 1.2,
-            "pause_resume_delay": 0.6,
-            "ramp_steps": 20
-        },
-        "pause_key": "#"
-    }
+import os
+import sys
+from single_instance import InstanceLock
 
-    @classmethod
-    def load_config(cls):
-        os.makedirs(os.path.dirname(SETTINGS_FILE), exist_ok=True)
-        
+# Zweiter Start: Dateien an die laufende Instanz übergeben, bevor Tk geladen wird
+if __name__ == "__main__":
+    _instance = InstanceLock()
+    if not _instance.acquire():
+        if _instance.forward(sys.argv[1:]):
+            sys.exit(0)
+        print("Application is already running!", file=sys.stderr)
+        # Start aus dem Menü hat kein Terminal - nur in diesem Fehlerfall Tk laden
         try:
-            with open(SETTINGS_FILE, 'r', encoding="utf-8") as file:
-                user_config = json.load(file)
-        except (FileNotFoundError, json.JSONDecodeError):
-            user_config = {}
-        
-        config = cls.DEFAULT_CONFIG.copy()
-        
-        for key, value in user_config.items():
-            if key == "timing_config" and isinstance(value, dict):
-                config[key] = {**config[key], **value}
-            elif key == "key_mapping" and isinstance(value, dict):
-                config[key] = {**config[key], **value}
-            else:
-                config[key] = value
-        
-        return config
+            import tkinter as tk
+            from tkinter import messagebox
+            _root = tk.Tk()
+            _root.withdraw()
+            messagebox.showerror("Error", "Application is already running!", parent=_root)
+            _root.destroy()
+        except Exception:
+            pass
+        sys.exit(1)
 
-    @classmethod
-    def save_config(cls, config_data):
-        current_config = cls.load_config()
-        
-        for key, value in config_data.items():
-            if key in ["timing_config", "key_mapping"] and isinstance(value, dict):
-                current_config[key] = {**current_config.get(key, {}), **value}
-            else:
-                current_config[key] = value
-                
-        with open(SETTINGS_FILE, 'w', encoding="utf-8") as file:
-            json.dump(current_config, file, indent=3, ensure_ascii=False)
+import platform
+from functools import partial
+from pathlib import Path
+from threading import Thread
+import tkinter as tk
+from tkinter import filedialog, messagebox, simpledialog
+from update_checker import check_update_async
+from song_library import SongLibrary
+from playlist import Playlist
+from song_search import SongIndex
+from recorder import KeyRecorder, build_sheet, write_sheet
+from player import LM, ConfigManager, MusicPlayer, set_error_handler, version
+
+# Bis das Hauptfenster steht, kommen Fehler nur aus dem Tk-Thread
+set_error_handler(messagebox.showerror)
+
+DEFAULT_WINDOW_SIZE = (400, 360)
+EXPANDED_SIZE = (400, 460)
+FULL_SIZE = (400, 550)
+STARTUP_TARGET_MS = 500
 
 # -------------------------------
 # GUI: Language Selection
@@ -216,222 +97,183 @@ class LanguageWindow:
         cls._open = False
 
 # -------------------------------
-# KeyboardLayoutManager
-# -------------------------------        
+# GUI: Playlist
+# -------------------------------
 
-class KeyboardLayoutManager:
-    @classmethod
-    def load_layout(cls, layout_name):
-        try:
-            file_path = os.path.join('resources', 'layouts', f"{layout_name.lower()}.xml")
-            if not os.path.exists(file_path):
-                raise FileNotFoundError(f"Layout file not found: {file_path}")
-                
-            tree = ET.parse(file_path)
-            mapping = {}
-            
-            for key in tree.getroot().findall('key'):
-                key_id = key.get('id')
-                key_value = key.text.strip() if key.text else ""
-                if key_id and key_value:
-                    mapping[key_id] = key_value
-                
-            return mapping
-        except Exception as e:
-            raise Exception(f"Error loading layout '{layout_name}': {str(e)}")
+class PlaylistWindow:
+    def __init__(self, app):
+        self.app = app
+        self.playlist = app.playlist
+        self.top = tk.Toplevel(app.root)
+        self.top.title(LM.get_translation("playlist_window_title"))
+        self.top.geometry("420x360")
+
+        self.listbox = tk.Listbox(self.top, font=("Arial", 11), activestyle="none")
+        self.listbox.pack(fill="both", expand=True, padx=10, pady=(10, 5))
+
+        edit_frame = tk.Frame(self.top)
+        edit_frame.pack(pady=2)
+        for text, command in (
+            (LM.get_translation("playlist_add"), self.add_songs),
+            (LM.get_translation("playlist_remove"), self.remove_selected),
+            ("▲", lambda: self.move_selected(-1)),
+            ("▼", lambda: self.move_selected(1)),
+            (LM.get_translation("playlist_clear"), self.clear),
+        ):
+            tk.Button(edit_frame, text=text, command=command, font=("Arial", 11)).pack(side="left", padx=2)
+
+        option_frame = tk.Frame(self.top)
+        option_frame.pack(pady=2)
+        self.shuffle_var = tk.BooleanVar(self.top, value=self.playlist.shuffle)
+        self.repeat_var = tk.BooleanVar(self.top, value=self.playlist.repeat)
+        tk.Checkbutton(option_frame, text=LM.get_translation("playlist_shuffle"), variable=self.shuffle_var,
+                       command=self.update_options).pack(side="left", padx=5)
+        tk.Checkbutton(option_frame, text=LM.get_translation("playlist_repeat"), variable=self.repeat_var,
+                       command=self.update_options).pack(side="left", padx=5)
+
+        tk.Button(self.top, text=LM.get_translation("playlist_play"), command=app.play_playlist,
+                  font=("Arial", 13)).pack(pady=(5, 10))
+        self.refresh()
+
+    def refresh(self):
+        self.listbox.delete(0, "end")
+        for path in self.playlist.paths:
+            self.listbox.insert("end", Path(path).stem)
+
+    def add_songs(self):
+        songs_dir = Path.cwd() / "resources/Songs"
+        file_paths = filedialog.askopenfilenames(
+            parent=self.top,
+            initialdir=songs_dir if songs_dir.exists() else Path.cwd(),
+            filetypes=[(LM.get_translation("supported_formats"), "*.json *.txt *.skysheet")]
+        )
+        if file_paths:
+            self.playlist.add(*file_paths)
+            self.refresh()
+
+    def remove_selected(self):
+        for index in reversed(self.listbox.curselection()):
+            self.playlist.remove(index)
+        self.refresh()
+
+    def move_selected(self, offset):
+        selection = self.listbox.curselection()
+        if selection:
+            target = self.playlist.move(selection[0], offset)
+            self.refresh()
+            self.listbox.selection_set(target)
+
+    def clear(self):
+        self.playlist.clear()
+        self.refresh()
+
+    def update_options(self):
+        self.playlist.shuffle = self.shuffle_var.get()
+        self.playlist.repeat = self.repeat_var.get()
 
 # -------------------------------
-# Music Player
+# GUI: Song Browser
 # -------------------------------
 
-class MusicPlayer:
-    def __init__(self):
-        self.pause_flag = Event()
-        self.stop_event = Event()
-        self.play_thread = None
-        self.keyboard = Controller()
-        
-        config = ConfigManager.load_config()
-        self.key_map = self._create_key_map(config["key_mapping"])
-        self.press_duration = 0.1
-        self.speed = 1000
-        self.keypress_enabled = False
-        self.speed_enabled = False
-        
-        timing_config = config.get("timing_config", {})
-        self.initial_delay = timing_config.get("initial_delay", 1.2)
-        self.pause_resume_delay = timing_config.get("pause_resume_delay", 0.6)
-        self.ramp_steps = timing_config.get("ramp_steps", 20)
-        
-        self.speed_lock = Lock()
-        self.current_speed = 1000
-        self.ramp_counter = 0
-        self.is_ramping = False
-
-    def _create_key_map(self, mapping):
-        key_map = {}
-        for prefix in ['', '1', '2', '3']:
-            for key, value in mapping.items():
-                key_map[f"{prefix}{key}".lower()] = value
-        return key_map
-
-    def find_sky_window(self):
-        # Linux: X11 und Wayland
-        try:
-            # Wayland (mit XWayland)
-            if "WAYLAND_DISPLAY" in os.environ:
-                try:
-                    output = subprocess.check_output(
-                        ["xdotool", "search", "--name", "Sky"],
-                        stderr=subprocess.DEVNULL
-                    ).decode().strip()
-                    if output:
-                        return output.split()[0]  # Erste Window-ID
-                except:
-                    pass
-            # X11
-            elif X11_AVAILABLE:
-                d = display.Display()
-                windows = d.screen().root.query_tree().children
-                for w in windows:
-                    try:
-                        name = w.get_wm_name()
-                        if name and "Sky" in name:
-                            return w
-                    except:
-                        continue
-        except Exception:
-            pass
-        return None
-
-    def focus_window(self, window):
-        if window is None:
-            return False
-            
-        try:
-            # Linux: X11 und Wayland
-            if isinstance(window, str):  # Wayland (xdotool ID)
-                subprocess.run(
-                    ["xdotool", "windowactivate", window],
-                    stdout=subprocess.DEVNULL,
-                    stderr=subprocess.DEVNULL
-                )
-                return True
-            elif X11_AVAILABLE:  # X11
-                window.set_input_focus(X.RevertToParent, X.CurrentTime)
-                window.configure(stack_mode=X.Above)
-                window.display.sync()
-                return True
-            return False
-        except Exception:
-            return False
-
-    def parse_song(self, path):
-        path = Path(path)
-        if not path.resolve().as_posix().startswith(Path.cwd().as_posix()):
-            raise ValueError(LM.get_translation('security_error_path'))
-
-        if path.suffix.lower() not in ['.json', '.txt', '.skysheet']:
-            raise ValueError(LM.get_translation('invalid_file_format'))
-        
-        with path.open('r', encoding='utf-8') as f:
-            data = json.load(f)
-            return data[0] if isinstance(data, list) else data
-
-    def play_note(self, note, index, notes, current_speed):
-        key = self.key_map.get(note['key'].lower())
-        if key:
-            self.keyboard.press(key)
-            Timer(self.press_duration, self.keyboard.release, [key]).start()
-        
-        if index < len(notes) - 1:
-            next_time = notes[index + 1]['time']
-            wait_time = (next_time - note['time']) / 1000 * (1000 / current_speed)
-            time.sleep(wait_time)
-
-    def play_song(self, song_data):
-        notes = song_data.get("songNotes", [])
-
-        if not notes:
-            messagebox.showerror(LM.get_translation("error_title"), LM.get_translation("missing_song_notes"))
-            return
-
-        def is_sky_running():
-            # Linux
-            return any("sky" in p.name().lower() for p in psutil.process_iter())
-
-        if not is_sky_running():
-            messagebox.showerror(LM.get_translation("error_title"), LM.get_translation("sky_not_running"))
+class SongBrowser:
+    def __init__(self, app):
+        self.app = app
+        self.index = app.get_song_index()
+        self.results = []
+        self.top = tk.Toplevel(app.root)
+        self.top.title(LM.get_translation("song_browser_title"))
+        self.top.geometry("460x420")
+
+        self.query = tk.StringVar(self.top)
+        entry = tk.Entry(self.top, textvariable=self.query, font=("Arial", 13))
+        entry.pack(fill="x", padx=10, pady=(10, 5))
+        entry.bind("<Return>", lambda event: self.select())
+        entry.bind("<Down>", lambda event: self._move_selection(1))
+        entry.bind("<Up>", lambda event: self._move_selection(-1))
+
+        self.listbox = tk.Listbox(self.top, font=("Arial", 11), activestyle="none", selectmode="extended")
+        self.listbox.pack(fill="both", expand=True, padx=10, pady=5)
+        self.listbox.bind("<Double-Button-1>", lambda event: self.select())
+
+        self.count_label = tk.Label(self.top, font=("Arial", 10), fg="grey")
+        self.count_label.pack()
+
+        button_frame = tk.Frame(self.top)
+        button_frame.pack(pady=(5, 10))
+        for text, command in (
+            (LM.get_translation("song_browser_select"), self.select),
+            (LM.get_translation("song_browser_add"), self.add_to_playlist),
+            (LM.get_translation("song_browser_other_file"), self.other_file),
+        ):
+            tk.Button(button_frame, text=text, command=command, font=("Arial", 11)).pack(side="left", padx=2)
+
+        # Bei jedem Tastendruck neu filtern - der Index liegt im Speicher
+        self.query.trace_add("write", lambda *args: self.refresh())
+        self.refresh()
+        entry.focus_set()
+
+    def refresh(self):
+        self.results = self.index.search(self.query.get())
+        labels = [f"{song['name']}  —  {song['author']}" if song["author"] else song["name"]
+                  for song in self.results]
+        self.listbox.delete(0, "end")
+        if labels:
+            self.listbox.insert("end", *labels)
+            self.listbox.selection_set(0)
+        self.count_label.configure(
+            text=LM.get_translation("song_browser_count").format(len(self.results), len(self.index)))
+
+    def _move_selection(self, offset):
+        selection = self.listbox.curselection()
+        if not self.results:
             return
-        
-        self.is_ramping = True
-        self.ramp_counter = 0
-        
-        for i, note in enumerate(notes):
-            if self.stop_event.is_set():
-                break
-                
-            if self.pause_flag.is_set():
-                self.is_ramping = True
-                self.ramp_counter = 0
-                while self.pause_flag.is_set():
-                    time.sleep(0.1)
-                    if self.stop_event.is_set():
-                        break
-                
-                if not self.stop_event.is_set():
-                    time.sleep(self.pause_resume_delay)
-            
-            with self.speed_lock:
-                target_speed = self.current_speed
-                
-            if self.is_ramping and self.ramp_counter < self.ramp_steps:
-                speed_factor = 0.5 + 0.5 * (self.ramp_counter / self.ramp_steps)
-                current_speed = max(500, target_speed * speed_factor)
-                self.ramp_counter += 1
-                if self.ramp_counter >= self.ramp_steps:
-                    self.is_ramping = False
-            else:
-                current_speed = target_speed
-                
-            self.play_note(note, i, notes, current_speed)
-            
-        # Linux: System Bell
-        print('\a', end='', flush=True)
-        time.sleep(0.5)
-
-    def stop_playback(self):
-        self.stop_event.set()
-        self.pause_flag.clear()
-        if self.play_thread and self.play_thread.is_alive():
-            self.play_thread.join(timeout=1.0)
-        self.stop_event.clear()
-        self.is_ramping = False
-
-    def set_speed(self, speed):
-        with self.speed_lock:
-            self.current_speed = speed
+        index = min(len(self.results) - 1, max(0, (selection[0] if selection else -1) + offset))
+        self.listbox.selection_clear(0, "end")
+        self.listbox.selection_set(index)
+        self.listbox.see(index)
+
+    def _selected_paths(self):
+        return [self.results[i]["path"] for i in self.listbox.curselection()]
+
+    def select(self):
+        paths = self._selected_paths()
+        if paths:
+            self.app.set_selected_file(paths[0])
+            self.top.destroy()
+
+    def add_to_playlist(self):
+        paths = self._selected_paths()
+        if paths:
+            self.app.playlist.add(*paths)
+            if self.app.playlist_window and self.app.playlist_window.top.winfo_exists():
+                self.app.playlist_window.refresh()
+
+    def other_file(self):
+        self.top.destroy()
+        self.app.select_file_dialog()
 
 # -------------------------------
 # Main Application
 # -------------------------------
 
 class MusicApp:
-    def __init__(self):
+    def __init__(self, instance=None, paths=()):
         LM.initialize()
         if not LM._selected_language:
             LanguageWindow.show()
 
-        if self.is_already_running():
-            messagebox.showerror("Error", "Application is already running!")
-            sys.exit(1)
+        self.instance = instance
         
-        self.key_listener = Listener(on_press=self.handle_keypress)
+        # pynput erst hier laden - braucht ein Display, der Player nicht
+        from pynput.keyboard import Listener
+        self.key_listener = Listener(on_press=self.handle_keypress, on_release=self.handle_keyrelease)
         self.key_listener.start()
         
         config = ConfigManager.load_config()
         self.duration_presets = config["key_press_durations"]
         self.speed_presets = config["speed_presets"]
+        self.recorder = KeyRecorder(config["key_mapping"])
+        self.record_bpm = config.get("record_bpm", 0)
 
         self.version = version
         self.update_status = "checking"
@@ -440,43 +282,98 @@ class MusicApp:
 
         self.player = MusicPlayer()
         self.selected_file = None
+        self.playlist = Playlist()
+        self.playlist_window = None
+        self.song_browser = None
+        self.song_index = None
         self.root = None
+        self._start_token = 0
+        self._starting = False
+        self._countdown_until = None
+        self._was_busy = False
 
-        try:
-            result = check_update(self.version, "VanilleIce/ProjectLyrica")
-            self.update_status = result[0]
-            self.latest_version = result[1]
-            self.update_url = result[2]
-        except Exception:
-            self.update_status = "error"
-            self.latest_version = ""
-            self.update_url = ""
+        self.library = SongLibrary(loader=self.player.loader)
+        # Nur Zeilen unter diesem Ordner zeigen - die Datenbank kann alte Pfade (z.B. AppImage-Mounts) enthalten
+        self.songs_dir = Path.cwd() / "resources/Songs"
+        Thread(target=self._refresh_library, daemon=True).start()
 
         self._create_gui_components()
         self._setup_gui_layout()
+        set_error_handler(self._report_error)
 
-    @staticmethod
-    def is_already_running():
-        # Linux: Lockfile-Mechanismus
-        lock_file = "/tmp/ProjectLyrica.lock"
+        if paths:
+            self.open_paths(list(paths))
+        if self.instance:
+            self.instance.set_handler(self._on_instance_request)
+
+        check_update_async(
+            self.version, "VanilleIce/ProjectLyrica",
+            self._on_update_result
+        )
+        if os.environ.get("PROJECTLYRICA_STARTUP_TRACE"):
+            self.root.after_idle(self._report_startup_time)
+
+    def _on_update_result(self, result):
+        # Läuft im Update-Thread - Tk nur über after() ansprechen
         try:
-            if os.path.exists(lock_file):
-                with open(lock_file, "r") as f:
-                    pid = int(f.read().strip())
-                    if psutil.pid_exists(pid):
-                        return True
-                    else:
-                        os.remove(lock_file)
-            
-            with open(lock_file, "w") as f:
-                f.write(str(os.getpid()))
-            return False
+            self.root.after(0, self._apply_update_result, result)
+        except (RuntimeError, tk.TclError):
+            pass
+
+    def _report_error(self, title, message):
+        # Der Player meldet Fehler aus seinen Threads - Tk nur über after() ansprechen
+        try:
+            self.root.after(0, messagebox.showerror, title, message)
+        except (RuntimeError, tk.TclError):
+            pass
+
+    def _apply_update_result(self, result):
+        self.update_status, self.latest_version, self.update_url = result
+        self._update_version_link()
+
+    def _report_startup_time(self):
+        elapsed_ms = (time.perf_counter() - _start_time) * 1000
+        status = "ok" if elapsed_ms <= STARTUP_TARGET_MS else "over target"
+        print(f"startup: {elapsed_ms:.1f} ms (target {STARTUP_TARGET_MS} ms, {status})", flush=True)
+
+    def _on_instance_request(self, paths):
+        # Läuft im Listener-Thread einer zweiten Instanz
+        try:
+            self.root.after(0, self.open_paths, paths)
+        except (RuntimeError, tk.TclError):
+            pass
+
+    def open_paths(self, paths):
+        # Nur Kommandozeile und zweiter Start kommen hier an - diese Dateien hat der Benutzer gewählt
+        self.player.trust_paths(paths)
+        if len(paths) == 1:
+            self.set_selected_file(paths[0])
+        elif paths:
+            self.playlist.add(*paths)
+            self.show_playlist()
+            self.playlist_window.refresh()
+        self.root.deiconify()
+        self.root.lift()
+        self.root.focus_force()
+
+    def _refresh_library(self):
+        try:
+            if self.songs_dir.exists():
+                self.library.refresh(self.songs_dir)
+            self.song_index = SongIndex(self.library.songs(self.songs_dir))
         except Exception:
-            return False
+            pass
+
+    def get_song_index(self):
+        # Solange der Hintergrund-Scan läuft, reicht der bisherige Stand der Bibliothek
+        if self.song_index is None:
+            return SongIndex(self.library.songs(self.songs_dir))
+        return self.song_index
 
-    def _create_button(self, text, command, width=200, height=30, font=("Arial", 13), is_main=False, color=None):
+    def _create_button(self, text, command, width=200, height=30, font=("Arial", 13), is_main=False, color=None,
+                       parent=None):
         button = tk.Button(
-            self.root, 
+            parent or self.root, 
             text=text, 
             command=command,
             font=font,
@@ -511,6 +408,22 @@ class MusicApp:
             color="grey"
         )
         
+        self.library_frame = tk.Frame(self.root)
+        self.playlist_button = self._create_button(
+            LM.get_translation("playlist_button_text"),
+            self.show_playlist,
+            width=12,
+            parent=self.library_frame
+        )
+        self.record_button = self._create_button(
+            LM.get_translation("record_button_text"),
+            self.toggle_recording,
+            width=12,
+            parent=self.library_frame
+        )
+        self.playlist_button.pack(side="left", padx=3)
+        self.record_button.pack(side="left", padx=3)
+        
         keypress_text = f"{LM.get_translation('key_press')}: " + \
                        (LM.get_translation("enabled") if self.player.keypress_enabled else LM.get_translation("disabled"))
         self.keypress_toggle = self._create_button(keypress_text, self.toggle_keypress)
@@ -581,6 +494,99 @@ class MusicApp:
             is_main=True
         )
 
+        self.position_frame = tk.Frame(self.root)
+        self.position_slider = tk.Scale(
+            self.position_frame,
+            from_=0,
+            to=100,
+            resolution=0.1,
+            orient="horizontal",
+            showvalue=False,
+            length=260
+        )
+        self.position_slider.bind("<ButtonPress-1>", self._start_scrub)
+        self.position_slider.bind("<ButtonRelease-1>", self._end_scrub)
+        self.position_label = tk.Label(self.position_frame, text="0 %", font=("Arial", 11), width=11)
+        self.position_slider.pack(side="left")
+        self.position_label.pack(side="left", padx=5)
+        self.scrubbing = False
+        # Nur eine im Leerlauf gewählte Position gilt für den nächsten Start
+        self.start_fraction = 0.0
+
+        self.version_link = tk.Label(
+            self.status_frame,
+            font=("Arial", 11),
+            cursor="hand2"
+        )
+        self._update_version_link()
+        
+        self.version_link.pack(side="right")
+        self.version_link.bind("<Button-1>", self.open_github_releases)
+
+        self.metrics_label = tk.Label(self.status_frame, font=("Arial", 10), fg="grey")
+        self.metrics_label.pack(side="left")
+        self.root.after(250, self._poll_metrics)
+
+    def _poll_metrics(self):
+        stats = self.player.metrics.snapshot()
+        if stats["active"]:
+            text = LM.get_translation('playback_metrics_text').format(
+                stats["notes_played"], stats["total_notes"], stats["p99_ms"], stats["speed"])
+            if stats["unmapped"]:
+                text += f"  ⚠ {stats['unmapped']}"
+            color = "red" if stats["p99_ms"] > 10 else "grey"
+        else:
+            text, color = "", "grey"
+        if self.metrics_label.cget("text") != text:
+            self.metrics_label.configure(text=text, fg=color)
+        if self._countdown_until is None:
+            self._update_play_button()
+        busy = self.is_busy()
+        if self._was_busy and not busy:
+            # Wiedergabe beendet oder gestoppt - nächster Start wieder von vorn
+            self.reset_position()
+        self._was_busy = busy
+        if self.recorder.recording:
+            self.record_button.configure(text=LM.get_translation("record_stop_text").format(len(self.recorder)))
+        if stats["active"] and not self.scrubbing and self.player.duration_ns:
+            self.position_slider.set(100 * self.player.position_ns / self.player.duration_ns)
+            self._update_position_label()
+        self.root.after(250, self._poll_metrics)
+
+    @staticmethod
+    def _format_time(ns):
+        seconds = int(ns // 1_000_000_000)
+        return f"{seconds // 60}:{seconds % 60:02d}"
+
+    def _update_position_label(self):
+        duration = self.player.duration_ns
+        position = duration * self.position_slider.get() / 100
+        if duration:
+            text = f"{self._format_time(position)} / {self._format_time(duration)}"
+        else:
+            text = f"{self.position_slider.get():.0f} %"
+        self.position_label.configure(text=text)
+
+    def _start_scrub(self, event):
+        self.scrubbing = True
+
+    def _end_scrub(self, event):
+        self.scrubbing = False
+        # Während der Wiedergabe springen, sonst gilt die Position für den nächsten Start
+        if self.player.metrics.active:
+            self.player.seek_fraction(self.position_slider.get() / 100)
+        elif not self.is_busy():
+            self.start_fraction = self.position_slider.get() / 100
+        self._update_position_label()
+        self.root.focus()
+
+    def reset_position(self):
+        self.start_fraction = 0.0
+        self.position_slider.set(0)
+        self.player.duration_ns = 0
+        self._update_position_label()
+
+    def _update_version_link(self):
         if self.update_status == "update":
             version_text = LM.get_translation('update_available_text').format(self.latest_version)
             text_color = "orange"
@@ -593,19 +599,10 @@ class MusicApp:
         else:
             version_text = LM.get_translation('current_version_text').format(self.version)
             text_color = "blue"
-        
-        self.version_link = tk.Label(
-            self.status_frame,
-            text=version_text,
-            font=("Arial", 11),
-            fg=text_color,
-            cursor="hand2"
-        )
-        
-        self.version_link.pack(side="right")
-        self.version_link.bind("<Button-1>", self.open_github_releases)
+        self.version_link.configure(text=version_text, fg=text_color)
 
     def open_github_releases(self, event):
+        import webbrowser
         try:
             if (self.update_status == "update" and 
                 self.update_url and 
@@ -622,9 +619,11 @@ class MusicApp:
     def _setup_gui_layout(self):
         self.title_label.pack(pady=10)
         self.file_button.pack(pady=10)
+        self.library_frame.pack(pady=5)
         self.keypress_toggle.pack(pady=5)
         self.speed_toggle.pack(pady=5)
         self.play_button.pack(pady=10)
+        self.position_frame.pack(pady=(0, 5))
         
         if self.player.keypress_enabled:
             self._pack_duration_controls()
@@ -653,41 +652,148 @@ class MusicApp:
             self.root.geometry(f"{DEFAULT_WINDOW_SIZE[0]}x{DEFAULT_WINDOW_SIZE[1]}")
 
     def select_file(self):
+        if self.song_browser and self.song_browser.top.winfo_exists():
+            self.song_browser.top.lift()
+            return
+        self.song_browser = SongBrowser(self)
+
+    def set_selected_file(self, path):
+        self.selected_file = path
+        self.file_button.configure(text=Path(path).name)
+        self.reset_position()
+        self.root.focus()
+
+    def select_file_dialog(self):
         songs_dir = Path.cwd() / "resources/Songs"
         file_path = filedialog.askopenfilename(
             initialdir=songs_dir if songs_dir.exists() else Path.cwd(),
             filetypes=[(LM.get_translation("supported_formats"), "*.json *.txt *.skysheet")]
         )
         if file_path:
-            self.selected_file = file_path
-            self.file_button.configure(text=Path(file_path).name)
-            self.root.focus()
+            self.set_selected_file(file_path)
 
     def play_selected(self):
+        if self.is_busy():
+            self.stop_playback()
+            return
         if not self.selected_file:
             messagebox.showwarning(LM.get_translation("warning_title"), LM.get_translation("choose_song_warning"))
             return
-            
+
+        path = self.selected_file
+        fraction = self.start_fraction
+
+        def prepare():
+            song = self.player.load_song(path)
+            if not len(song):
+                raise ValueError(LM.get_translation("missing_song_notes"))
+            position_ns = int(song.duration_ns * fraction)
+            if position_ns >= song.duration_ns:
+                position_ns = 0
+            return partial(self.player.play_song, song, position_ns=position_ns)
+
+        self._start_pipeline(prepare)
+
+    def show_playlist(self):
+        if self.playlist_window and self.playlist_window.top.winfo_exists():
+            self.playlist_window.top.lift()
+            return
+        self.playlist_window = PlaylistWindow(self)
+
+    def play_playlist(self):
+        if not len(self.playlist):
+            messagebox.showwarning(LM.get_translation("warning_title"), LM.get_translation("playlist_empty_warning"))
+            return
+
+        def prepare():
+            # Erstes Lied schon hier laden, damit der Countdown nicht auf große Sheets warten muss
+            first = self.player.prepare_playlist(self.playlist)
+            if first is None:
+                raise ValueError(self.player.playlist_error_text())
+            return partial(self.player.play_playlist, self.playlist, first)
+
+        self._start_pipeline(prepare)
+
+    # Play-Ablauf: Vorbereitung im Worker, Countdown über after(), Wiedergabe im Player-Thread.
+    # Jeder Start bekommt ein Token; Stop erhöht es und verwirft damit noch laufende Schritte.
+
+    def is_busy(self):
+        return self._starting or bool(self.player.play_thread and self.player.play_thread.is_alive())
+
+    def _start_pipeline(self, prepare):
         self.player.stop_playback()
+        self._start_token += 1
+        self._starting = True
+        self._countdown_until = None
+        self._update_play_button()
+        Thread(target=self._prepare_worker, args=(self._start_token, prepare), daemon=True).start()
+
+    def _prepare_worker(self, token, prepare):
         try:
-            song_data = self.player.parse_song(self.selected_file)
-            sky_window = self.player.find_sky_window()
-            
-            self.player.focus_window(sky_window)
-            
-            time.sleep(self.player.initial_delay)
-            
-            self.player.play_thread = Thread(target=self.player.play_song, args=(song_data,), daemon=True)
-            self.player.play_thread.start()
+            run = prepare()
+            self.player.focus_window(self.player.find_sky_window())
+            error = None
         except Exception as e:
-            messagebox.showerror(LM.get_translation("error_title"), f"{LM.get_translation('play_error_message')}: {e}")
+            run, error = None, e
+        try:
+            self.root.after(0, self._on_prepared, token, run, error)
+        except (RuntimeError, tk.TclError):
+            pass
+
+    def _on_prepared(self, token, run, error):
+        if token != self._start_token:
+            return
+        self._starting = False
+        if error is not None:
+            self._update_play_button()
+            messagebox.showerror(LM.get_translation("error_title"), f"{LM.get_translation('play_error_message')}: {error}")
+            return
+        # play_song wartet selbst bis start_ns - Stop bricht auch diese Wartezeit ab
+        start_ns = time.monotonic_ns() + int(self.player.initial_delay * 1e9)
+        self.player.play_thread = Thread(target=run, kwargs={"start_ns": start_ns}, daemon=True)
+        self.player.play_thread.start()
+        self._countdown_until = start_ns
+        self._countdown(token)
+
+    def _countdown(self, token):
+        if token != self._start_token or self._countdown_until is None:
+            return
+        remaining = self._countdown_until - time.monotonic_ns()
+        if remaining > 0 and self.player.play_thread.is_alive():
+            self.play_button.configure(text=LM.get_translation("countdown_text").format(remaining / 1e9))
+            self.root.after(min(100, remaining // 1_000_000 + 1), self._countdown, token)
+        else:
+            self._countdown_until = None
+            self._update_play_button()
+
+    def _update_play_button(self):
+        if self._starting:
+            key = "play_preparing_text"
+        elif self.is_busy():
+            key = "stop_button_text"
+        else:
+            key = "play_button_text"
+        text = LM.get_translation(key)
+        if self.play_button.cget("text") != text:
+            self.play_button.configure(text=text)
+
+    def stop_playback(self):
+        self._start_token += 1
+        self._starting = False
+        self._countdown_until = None
+        self.player.stop_playback()
+        self.reset_position()
+        self._update_play_button()
 
     def set_press_duration(self, value):
         self.player.press_duration = round(float(value), 3)
         self.duration_label.configure(text=f"{LM.get_translation('duration')} {self.player.press_duration} s")
 
     def handle_keypress(self, key):
-        pause_key = ConfigManager.load_config().get("pause_key", "#")
+        # Aufnahme zuerst - der Zeitstempel soll so früh wie möglich genommen werden
+        if self.recorder.recording and self.recorder.press(key):
+            return
+        pause_key = ConfigManager.get_pause_key()
         
         try:
             # Direkter Vergleich der Tasten
@@ -696,13 +802,52 @@ class MusicApp:
         except AttributeError:
             pass
 
+    def handle_keyrelease(self, key):
+        if self.recorder.recording:
+            self.recorder.release(key)
+
+    def toggle_recording(self):
+        if not self.recorder.recording:
+            # Eigene Wiedergabe würde sonst mit aufgenommen
+            self.stop_playback()
+            self.recorder.set_mapping(ConfigManager.load_config()["key_mapping"])
+            self.recorder.start()
+            self.record_button.configure(text=LM.get_translation("record_stop_text").format(0))
+            return
+
+        notes = self.recorder.stop()
+        self.record_button.configure(text=LM.get_translation("record_button_text"))
+        if not notes:
+            return
+        bpm = simpledialog.askinteger(
+            LM.get_translation("record_bpm_title"), LM.get_translation("record_bpm_prompt"),
+            initialvalue=self.record_bpm, minvalue=0, maxvalue=1000, parent=self.root)
+        if bpm is None:
+            bpm = 0
+        songs_dir = Path.cwd() / "resources/Songs"
+        file_path = filedialog.asksaveasfilename(
+            initialdir=songs_dir if songs_dir.exists() else Path.cwd(),
+            defaultextension=".skysheet",
+            filetypes=[(LM.get_translation("supported_formats"), "*.skysheet *.json *.txt")]
+        )
+        if not file_path:
+            return
+        self.record_bpm = bpm
+        ConfigManager.save_config({"record_bpm": bpm})
+        try:
+            write_sheet(file_path, build_sheet(notes, Path(file_path).stem, bpm))
+        except OSError as e:
+            messagebox.showerror(LM.get_translation("error_title"), str(e))
+            return
+        self.set_selected_file(file_path)
+
     def toggle_pause(self):
-        if self.player.pause_flag.is_set():
-            self.player.pause_flag.clear()
+        if self.player.state.paused:
             if sky_window := self.player.find_sky_window():
                 self.player.focus_window(sky_window)
+            self.player.resume()
         else:
-            self.player.pause_flag.set()
+            self.player.pause()
 
     def set_speed(self, speed):
         self.player.set_speed(speed)
@@ -740,7 +885,10 @@ class MusicApp:
         self.adjust_window_size()
 
     def shutdown(self):
-        self.player.stop_playback()
+        self.stop_playback()
+        ConfigManager.flush()
+        if self.instance:
+            self.instance.release()
         if hasattr(self, 'key_listener') and self.key_listener.is_alive():
             self.key_listener.stop()
         self.root.quit()
@@ -754,5 +902,5 @@ class MusicApp:
 # -------------------------------
 
 if __name__ == "__main__":
-    app = MusicApp()
+    app = MusicApp(_instance, [os.path.abspath(p) for p in sys.argv[1:]])
     app.run()
\ No newline at end of file
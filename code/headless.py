@@ -0,0 +1,229 @@
+# Copyright (C) 2025 VanilleIce
+# This program is licensed under the GNU AGPLv3. See LICENSE for details.
+# Source code: https://github.com/VanilleIce/ProjectLyrica_Linux
+
+"""Headless player controlled over a Unix domain socket - no Tk, no key listener.
+
+    python3 code/headless.py [--backend dry-run] [--no-sky-check] [song]
+    python3 code/headless.py --send play path=resources/Songs/song.skysheet
+    python3 code/headless.py --send set-speed speed=1200
+    python3 code/headless.py --send seek seconds=90
+    python3 code/headless.py --send status
+
+Protocol: one JSON object per line in both directions, e.g.
+{"cmd": "pause"} -> {"ok": true}. Commands: play, pause, resume, stop,
+seek, set-speed, status, quit.
+
+Songs given on the command line or with play may lie outside the app folder.
+Like files handed to the GUI, they are trusted because they come from the
+user: the socket is only accessible to its owner (mode 0600). Relative paths
+are resolved against the caller's working directory by --send and the song
+argument; a raw client should send absolute paths.
+"""
+
+import argparse
+import json
+import os
+import socket
+import socketserver
+import sys
+import tempfile
+import threading
+import time
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_SOCKET = os.path.join(os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir(),
+                              f"ProjectLyrica-{os.getuid()}.sock")
+
+
+class ControlServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path, player):
+        self.player = player
+        self.play_lock = threading.Lock()
+        self.quit_requested = False
+        super().__init__(socket_path, _ControlHandler)
+
+    def dispatch(self, request):
+        command = request.get("cmd")
+        handler = getattr(self, "cmd_" + str(command).replace("-", "_"), None)
+        if handler is None:
+            return {"ok": False, "error": f"unknown command: {command}"}
+        try:
+            result = handler(request) or {}
+        except Exception as e:
+            return {"ok": False, "error": str(e)}
+        return {"ok": True, **result}
+
+    def cmd_play(self, request):
+        from player import LM
+        player = self.player
+        with self.play_lock:
+            player.stop_playback()
+            player.trust_paths([request["path"]])
+            song = player.load_song(request["path"])
+            if not len(song):
+                raise ValueError(LM.get_translation("missing_song_notes"))
+            if request.get("focus", True):
+                player.focus_window(player.find_sky_window())
+            delay = float(request.get("delay", player.initial_delay))
+            start_ns = time.monotonic_ns() + int(delay * 1e9)
+            position_ns = int(float(request.get("seconds", 0)) * 1e9)
+            player.current_path = request["path"]
+            player.play_thread = threading.Thread(
+                target=player.play_song, args=(song,),
+                kwargs={"start_ns": start_ns, "position_ns": position_ns}, daemon=True)
+            player.play_thread.start()
+        return {"notes": song.note_count, "unmapped": song.unmapped,
+                "duration_ms": song.duration_ns // 1_000_000}
+
+    def cmd_pause(self, request):
+        self.player.pause()
+
+    def cmd_resume(self, request):
+        self.player.resume()
+
+    def cmd_stop(self, request):
+        with self.play_lock:
+            self.player.stop_playback()
+
+    def cmd_seek(self, request):
+        """seconds=<song time> or fraction=<0..1>."""
+        if "fraction" in request:
+            self.player.seek_fraction(float(request["fraction"]))
+        else:
+            self.player.seek(float(request["seconds"]) * 1e9)
+
+    def cmd_set_speed(self, request):
+        self.player.set_speed(int(request["speed"]))
+
+    def cmd_status(self, request):
+        player = self.player
+        playing = bool(player.play_thread and player.play_thread.is_alive())
+        return {
+            "playing": playing,
+            "paused": player.state.paused,
+            "speed": player.current_speed,
+            "path": player.current_path if playing else None,
+            "position_s": player.position_ns / 1e9,
+            "duration_s": player.duration_ns / 1e9,
+            "metrics": player.metrics.snapshot(),
+            "performance": player.performance_applied,
+        }
+
+    def cmd_quit(self, request):
+        # Beendet wird erst, nachdem der Handler die Antwort geschrieben hat
+        self.quit_requested = True
+
+
+class _ControlHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                request = json.loads(line)
+            except ValueError:
+                response = {"ok": False, "error": "invalid JSON"}
+            else:
+                response = self.server.dispatch(request if isinstance(request, dict) else {})
+            self.wfile.write(json.dumps(response, ensure_ascii=False).encode("utf-8") + b"\n")
+            self.wfile.flush()
+            if self.server.quit_requested:
+                threading.Thread(target=self.server.shutdown, daemon=True).start()
+                return
+
+
+def send_command(request, socket_path=DEFAULT_SOCKET, timeout=5.0):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(socket_path)
+        sock.sendall(json.dumps(request).encode("utf-8") + b"\n")
+        with sock.makefile("rb") as f:
+            return json.loads(f.readline())
+
+
+def _claim_socket(socket_path):
+    """Removes a stale socket file; fails if a live daemon is still listening."""
+    if not os.path.exists(socket_path):
+        return
+    try:
+        send_command({"cmd": "status"}, socket_path, timeout=0.5)
+    except (OSError, ValueError):
+        os.unlink(socket_path)
+        return
+    raise SystemExit(f"already running: {socket_path}")
+
+
+def serve(args):
+    os.chdir(APP_DIR)
+    from player import LM, ConfigManager, MusicPlayer, create_backend
+
+    LM.initialize()
+    config = ConfigManager.load_config()
+    backend = create_backend(args.backend or config.get("input_backend", "auto"), config["key_mapping"])
+    player = MusicPlayer(backend=backend)
+    player.require_sky = not args.no_sky_check
+    if args.performance:
+        player.performance_mode = True
+
+    _claim_socket(args.socket)
+    server = ControlServer(args.socket, player)
+    os.chmod(args.socket, 0o600)
+    print(f"listening on {args.socket} (backend {backend.name})", flush=True)
+
+    if args.song:
+        print(json.dumps(server.dispatch({"cmd": "play", "path": args.song})), flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        player.stop_playback()
+        server.server_close()
+        try:
+            os.unlink(args.socket)
+        except OSError:
+            pass
+        ConfigManager.flush()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Project Lyrica headless player")
+    parser.add_argument("song", nargs="?", help="song to start right away")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET, help="control socket path")
+    parser.add_argument("--backend", choices=["auto", "pynput", "xtest", "dry-run"])
+    parser.add_argument("--no-sky-check", action="store_true", help="play even if Sky is not running")
+    parser.add_argument("--performance", action="store_true",
+                        help="freeze the GC, pin the playback thread and raise its priority while playing")
+    parser.add_argument("--send", nargs="+", metavar=("CMD", "KEY=VALUE"),
+                        help="send one command to a running daemon and print the reply")
+    args = parser.parse_args(argv)
+
+    if args.send:
+        request = {"cmd": args.send[0]}
+        for item in args.send[1:]:
+            key, _, value = item.partition("=")
+            request[key] = os.path.abspath(value) if key == "path" else value
+        try:
+            reply = send_command(request, args.socket)
+        except OSError as e:
+            print(f"cannot reach {args.socket}: {e}", file=sys.stderr)
+            return 1
+        except ValueError:
+            print(f"no valid reply from {args.socket}", file=sys.stderr)
+            return 1
+        print(json.dumps(reply, indent=2, ensure_ascii=False))
+        return 0 if reply.get("ok") else 1
+
+    if args.song:
+        # Relativ zum Aufrufer, serve() wechselt ins App-Verzeichnis
+        args.song = os.path.abspath(args.song)
+    serve(args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
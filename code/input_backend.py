@@ -0,0 +1,122 @@
+# Copyright (C) 2025 VanilleIce
+# This program is licensed under the GNU AGPLv3. See LICENSE for details.
+# Source code: https://github.com/VanilleIce/ProjectLyrica_Linux
+
+import os
+
+try:
+    from Xlib import display, X
+    from Xlib.ext import xtest
+    X11_AVAILABLE = True
+except ImportError:
+    X11_AVAILABLE = False
+
+
+class PynputBackend:
+    name = "pynput"
+
+    def __init__(self):
+        from pynput.keyboard import Controller
+        self.keyboard = Controller()
+
+    def set_mapping(self, key_mapping):
+        pass
+
+    def press_keys(self, keys):
+        for key in keys:
+            self.keyboard.press(key)
+
+    def release_keys(self, keys):
+        for key in keys:
+            self.keyboard.release(key)
+
+
+class XTestBackend:
+    """Injects raw XTest events with keycodes resolved once per layout.
+
+    All keys of a chord go out in one batch followed by a single sync(), so
+    they land in the same frame. Characters without an unshifted keycode on
+    the current X keymap are delegated to pynput.
+    """
+
+    name = "xtest"
+
+    def __init__(self):
+        if not X11_AVAILABLE:
+            raise RuntimeError("python-xlib is not installed")
+        self.display = display.Display()
+        if not self.display.has_extension("XTEST"):
+            self.display.close()
+            raise RuntimeError("X server has no XTEST extension")
+        self.fallback = PynputBackend()
+        self.keycodes = {}
+
+    @staticmethod
+    def _keysym(char):
+        code = ord(char)
+        # Latin-1 Keysyms entsprechen dem Codepoint, alles andere liegt im Unicode-Bereich
+        return code if code < 0x100 else 0x01000000 | code
+
+    def _resolve(self, char):
+        if len(char) != 1:
+            return None
+        keysym = self._keysym(char)
+        for keycode, index in self.display.keysym_to_keycodes(keysym):
+            if index == 0:
+                return keycode
+        return None
+
+    def set_mapping(self, key_mapping):
+        self.keycodes = {char: self._resolve(char) for char in set(key_mapping.values())}
+
+    def _send(self, event_type, keys, fallback):
+        keycodes = self.keycodes
+        sent = False
+        for key in keys:
+            keycode = keycodes.get(key, 0)
+            if keycode == 0:
+                keycode = keycodes[key] = self._resolve(key)
+            if keycode is None:
+                fallback(key)
+                continue
+            xtest.fake_input(self.display, event_type, keycode)
+            sent = True
+        if sent:
+            self.display.sync()
+
+    def press_keys(self, keys):
+        self._send(X.KeyPress, keys, self.fallback.keyboard.press)
+
+    def release_keys(self, keys):
+        self._send(X.KeyRelease, keys, self.fallback.keyboard.release)
+
+
+class DryRunBackend:
+    """Swallows all key events - for headless end-to-end runs without input injection."""
+
+    name = "dry-run"
+
+    def set_mapping(self, key_mapping):
+        pass
+
+    def press_keys(self, keys):
+        pass
+
+    def release_keys(self, keys):
+        pass
+
+
+def create_backend(name, key_mapping):
+    """name: "pynput", "xtest", "dry-run" or "auto" (XTest if an X display is reachable)."""
+    if name == "dry-run":
+        return DryRunBackend()
+    backend = None
+    if name in ("xtest", "auto") and os.environ.get("DISPLAY"):
+        try:
+            backend = XTestBackend()
+        except Exception:
+            backend = None
+    if backend is None:
+        backend = PynputBackend()
+    backend.set_mapping(key_mapping)
+    return backend
@@ -0,0 +1,368 @@
+# Copyright (C) 2025 VanilleIce
+# This program is licensed under the GNU AGPLv3. See LICENSE for details.
+# Source code: https://github.com/VanilleIce/ProjectLyrica_Linux
+
+import gc
+import heapq
+import os
+import threading
+import time
+from array import array
+from bisect import bisect_right
+from contextlib import contextmanager
+
+SPIN_THRESHOLD_NS = 2_000_000
+RAMP_STEP_NS = 50_000_000
+
+
+def wait_until(deadline_ns: int, interrupt=None, spin_ns: int = SPIN_THRESHOLD_NS) -> bool:
+    """Waits for an absolute time.monotonic_ns() deadline.
+
+    Sleeps coarsely until spin_ns before the deadline and spins for the rest,
+    so the OS wakeup overshoot never reaches the note. A deadline that has
+    already passed returns immediately. Returns True if interrupt was set.
+    """
+    while True:
+        remaining = deadline_ns - time.monotonic_ns()
+        if remaining <= 0:
+            return False
+        if remaining > spin_ns:
+            timeout = (remaining - spin_ns) / 1e9
+            if interrupt is not None:
+                if interrupt.wait(timeout):
+                    return True
+            else:
+                time.sleep(timeout)
+        else:
+            # GIL freigeben, damit der Release-Worker nicht verhungert
+            time.sleep(0)
+
+
+@contextmanager
+def performance_mode(cpu=None, rt_priority=10, nice=-10):
+    """Low-jitter section for the calling thread; yields what could actually be applied.
+
+    Freezes and disables the cyclic GC, pins the thread to one core (default:
+    the last allowed one, away from the usual IRQ core 0) and asks for
+    SCHED_FIFO, falling back to a lower nice value. Everything the system
+    refuses is skipped; all of it is undone on exit.
+    """
+    applied = {"gc": False, "cpu": None, "policy": None}
+    tid = threading.get_native_id()
+
+    gc_was_enabled = gc.isenabled()
+    gc.collect()
+    gc.freeze()
+    gc.disable()
+    applied["gc"] = True
+
+    # Linux: pid 0 meint bei diesen Aufrufen den aufrufenden Thread
+    old_affinity = None
+    try:
+        allowed = os.sched_getaffinity(0)
+        target = cpu if cpu in allowed else max(allowed)
+        if len(allowed) > 1 or cpu is not None:
+            os.sched_setaffinity(0, {target})
+            old_affinity = allowed
+            applied["cpu"] = target
+    except (AttributeError, OSError):
+        pass
+
+    old_policy = old_nice = None
+    try:
+        old_policy = os.sched_getscheduler(0)
+        os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(rt_priority))
+        applied["policy"] = f"fifo:{rt_priority}"
+    except (AttributeError, OSError):
+        old_policy = None
+        try:
+            current = os.getpriority(os.PRIO_PROCESS, tid)
+            if nice < current:
+                os.setpriority(os.PRIO_PROCESS, tid, nice)
+                old_nice = current
+                applied["policy"] = f"nice:{nice}"
+        except (AttributeError, OSError):
+            pass
+
+    try:
+        yield applied
+    finally:
+        try:
+            if old_policy is not None:
+                os.sched_setscheduler(0, old_policy, os.sched_param(0))
+            if old_nice is not None:
+                os.setpriority(os.PRIO_PROCESS, tid, old_nice)
+            if old_affinity is not None:
+                os.sched_setaffinity(0, old_affinity)
+        except OSError:
+            pass
+        gc.unfreeze()
+        if gc_was_enabled:
+            gc.enable()
+
+
+class KeyReleaseScheduler:
+    """One long-lived worker that releases pressed keys from a min-heap of deadlines.
+
+    press_keys/release_keys take a whole chord, so a backend can batch it.
+    Re-pressing a key that is still held releases it first (so the game sees
+    a new stroke) and invalidates its pending release via a per-key sequence.
+    """
+
+    def __init__(self, press_keys, release_keys):
+        self._press_keys = press_keys
+        self._release_keys = release_keys
+        self._heap = []
+        self._pending = {}
+        self._seq = 0
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def press(self, keys, hold_ns: int):
+        with self._cond:
+            pending = self._pending
+            held = [key for key in keys if key in pending]
+            if held:
+                self._release_keys(held)
+            self._press_keys(keys)
+            deadline = time.monotonic_ns() + hold_ns
+            notify = not self._heap or deadline < self._heap[0][0]
+            for key in keys:
+                self._seq += 1
+                pending[key] = self._seq
+                heapq.heappush(self._heap, (deadline, self._seq, key))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+            elif notify:
+                self._cond.notify()
+
+    def release_all(self):
+        with self._cond:
+            if self._pending:
+                self._release_keys(list(self._pending))
+            self._pending.clear()
+            self._heap.clear()
+
+    def _run(self):
+        heap = self._heap
+        pending = self._pending
+        with self._cond:
+            while True:
+                if not heap:
+                    self._cond.wait()
+                    continue
+                now = time.monotonic_ns()
+                remaining = heap[0][0] - now
+                if remaining > 0:
+                    self._cond.wait(remaining / 1e9)
+                    continue
+                due = []
+                while heap and heap[0][0] <= now:
+                    _, seq, key = heapq.heappop(heap)
+                    if pending.get(key) == seq:
+                        del pending[key]
+                        due.append(key)
+                if due:
+                    self._release_keys(due)
+
+
+class PlaybackState:
+    """Pause/stop flags behind one condition variable.
+
+    Waiters wake the moment either flag changes instead of polling. wait()
+    follows the Event.wait protocol that wait_until expects and returns True
+    once playback is paused or stopped, or when nudge() asks the play loop to
+    recompute its deadline (e.g. after a speed change).
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self.paused = False
+        self.stopped = False
+        self._generation = 0
+
+    def _set(self, paused, stopped):
+        with self._cond:
+            self.paused = paused
+            self.stopped = stopped
+            self._cond.notify_all()
+
+    def pause(self):
+        with self._cond:
+            if not self.stopped:
+                self.paused = True
+                self._cond.notify_all()
+
+    def resume(self):
+        with self._cond:
+            self.paused = False
+            self._cond.notify_all()
+
+    def stop(self):
+        self._set(False, True)
+
+    def reset(self):
+        self._set(False, False)
+
+    def nudge(self):
+        with self._cond:
+            self._generation += 1
+            self._cond.notify_all()
+
+    def wait(self, timeout=None) -> bool:
+        with self._cond:
+            generation = self._generation
+            return self._cond.wait_for(
+                lambda: self.paused or self.stopped or self._generation != generation, timeout)
+
+    def wait_resumed(self) -> bool:
+        """Blocks while paused. Returns False if playback was stopped instead."""
+        with self._cond:
+            self._cond.wait_for(lambda: not self.paused or self.stopped)
+            return not self.stopped
+
+
+class TimeWarp:
+    """Maps song time to wall time (both ns) as a piecewise-linear function.
+
+    Every segment starts at (song_ns, wall_ns) and runs at a constant speed
+    (1000 = normal) until the next one. set_speed() only replaces what lies
+    after the playhead, so all notes still ahead are re-timed at once while the
+    part already played stays where it was. Lookups walk a cursor forward and
+    cost O(1) per note for monotonic queries.
+    """
+
+    def __init__(self, song_ns, wall_ns, speed):
+        self.rebase(song_ns, wall_ns, speed)
+
+    def rebase(self, song_ns, wall_ns, speed):
+        """Drops all segments and continues at song_ns from wall_ns (after pause or seek)."""
+        self._song = [song_ns]
+        self._wall = [wall_ns]
+        self._speed = [speed]
+        self._cursor = 0
+
+    @property
+    def target_speed(self):
+        return self._speed[-1]
+
+    def _locate(self, song_ns):
+        song = self._song
+        k = self._cursor
+        if song_ns < song[k]:
+            k = max(0, bisect_right(song, song_ns) - 1)
+        else:
+            last = len(song) - 1
+            while k < last and song[k + 1] <= song_ns:
+                k += 1
+        self._cursor = k
+        return k
+
+    def wall_time(self, song_ns):
+        k = self._locate(song_ns)
+        return self._wall[k] + int((song_ns - self._song[k]) * 1000 / self._speed[k])
+
+    def speed_at(self, song_ns):
+        return self._speed[self._locate(song_ns)]
+
+    def song_time(self, wall_ns):
+        k = max(0, bisect_right(self._wall, wall_ns) - 1)
+        return self._song[k] + int((wall_ns - self._wall[k]) * self._speed[k] / 1000)
+
+    def set_speed(self, speed, wall_ns, ramp_ns=0, from_speed=None):
+        """Switches to speed at wall_ns, gliding over ramp_ns in RAMP_STEP_NS steps.
+
+        The ramp starts at from_speed, or at the speed playing at wall_ns.
+        """
+        song_ns = self.song_time(wall_ns)
+        k = max(0, bisect_right(self._wall, wall_ns) - 1)
+        if from_speed is None:
+            from_speed = self._speed[k]
+        # Segment k endet am Playhead, alles danach wird ersetzt
+        if self._wall[k] >= wall_ns:
+            k -= 1
+        del self._song[k + 1:], self._wall[k + 1:], self._speed[k + 1:]
+        self._cursor = max(0, min(self._cursor, k))
+
+        steps = int(ramp_ns // RAMP_STEP_NS) if ramp_ns > 0 and from_speed != speed else 0
+        if steps:
+            step_ns = ramp_ns / steps
+            for j in range(steps):
+                # Mittelwert je Stufe - die Rampe kostet genau so viel Songzeit wie eine lineare
+                step_speed = from_speed + (speed - from_speed) * (j + 0.5) / steps
+                self._append(song_ns, wall_ns, step_speed)
+                song_ns += int(step_ns * step_speed / 1000)
+                wall_ns += int(step_ns)
+        self._append(song_ns, wall_ns, speed)
+
+    def _append(self, song_ns, wall_ns, speed):
+        self._song.append(song_ns)
+        self._wall.append(wall_ns)
+        self._speed.append(speed)
+
+
+class PlaybackMetrics:
+    """Live counters of the running song, cheap enough to record on every chord.
+
+    Lateness of the last `window` chords is kept in a preallocated ring buffer;
+    percentiles are only computed when a reader asks for a snapshot. With a
+    trace path set, scheduled and actual times of every chord are collected
+    and written as CSV by write_trace().
+    """
+
+    def __init__(self, window=256):
+        self.window = window
+        self._lateness = array("q", bytes(8 * window))
+        self.reset()
+
+    def reset(self, total_notes=0, unmapped=0, trace_path=None):
+        self.total_notes = total_notes
+        self.unmapped = unmapped
+        self.notes_played = 0
+        self.chords_played = 0
+        self.last_lateness_ns = 0
+        self.speed = 0
+        self.active = False
+        self.trace_path = trace_path
+        self._trace = (array("q"), array("q")) if trace_path else None
+
+    def record(self, scheduled_ns, actual_ns, notes, speed):
+        lateness = actual_ns - scheduled_ns
+        self._lateness[self.chords_played % self.window] = lateness
+        self.chords_played += 1
+        self.notes_played += notes
+        self.last_lateness_ns = lateness
+        self.speed = speed
+        if self._trace is not None:
+            self._trace[0].append(scheduled_ns)
+            self._trace[1].append(actual_ns)
+
+    def percentile_ns(self, q):
+        count = min(self.chords_played, self.window)
+        if not count:
+            return 0
+        values = sorted(self._lateness[:count])
+        return values[round(q / 100 * (count - 1))]
+
+    def snapshot(self):
+        return {
+            "active": self.active,
+            "notes_played": self.notes_played,
+            "total_notes": self.total_notes,
+            "lateness_ms": self.last_lateness_ns / 1e6,
+            "p99_ms": self.percentile_ns(99) / 1e6,
+            "speed": self.speed,
+            "unmapped": self.unmapped,
+        }
+
+    def write_trace(self):
+        if self._trace is None:
+            return None
+        scheduled, actual = self._trace
+        os.makedirs(os.path.dirname(self.trace_path), exist_ok=True)
+        with open(self.trace_path, "w", encoding="utf-8") as f:
+            f.write("chord,scheduled_ns,actual_ns,lateness_ns\n")
+            for i in range(len(scheduled)):
+                f.write(f"{i},{scheduled[i]},{actual[i]},{actual[i] - scheduled[i]}\n")
+        return self.trace_path
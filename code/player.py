@@ -0,0 +1,618 @@
+# Copyright (C) 2025 VanilleIce
+# This program is licensed under the GNU AGPLv3. See LICENSE for details.
+# Source code: https://github.com/VanilleIce/ProjectLyrica_Linux
+
+import atexit
+import json
+import time
+import os
+import sys
+import threading
+from pathlib import Path
+from threading import Lock
+from concurrent.futures import ThreadPoolExecutor, wait as futures_wait
+from contextlib import nullcontext
+from song_compiler import compile_song
+from resource_bundle import load_bundle
+from playback import wait_until, KeyReleaseScheduler, PlaybackState, PlaybackMetrics, TimeWarp, performance_mode
+from input_backend import create_backend
+from song_loader import SongLoader, split_archive_path, is_safe_member, SONG_SUFFIXES
+from song_cache import SongCache
+from sky_tracker import SkyProcessTracker, SkyWindowTracker
+
+SETTINGS_FILE = os.path.join(os.path.expanduser("~"), ".config", "ProjectLyrica", "settings.json")
+TRACE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "ProjectLyrica", "traces")
+version = "1.0.1"
+
+_error_handler = None
+
+def set_error_handler(handler):
+    """handler(title, message) - the GUI installs messagebox.showerror here."""
+    global _error_handler
+    _error_handler = handler
+
+def report_error(title, message):
+    if _error_handler is not None:
+        _error_handler(title, message)
+    else:
+        print(f"{title}: {message}", file=sys.stderr, flush=True)
+
+# -------------------------------
+# Language Manager Class
+# -------------------------------
+
+class LM:
+    _bundle = None
+    _selected_language = None
+    _available_languages = []
+
+    @classmethod
+    def _resources(cls):
+        if cls._bundle is None:
+            try:
+                cls._bundle = load_bundle()
+            except Exception as e:
+                report_error("Error", f"Error loading translations: {e}")
+                cls._bundle = {"languages": [], "translations": {}, "layouts": {}}
+        return cls._bundle
+
+    @classmethod
+    def initialize(cls):
+        cls._selected_language = ConfigManager.load_config().get("selected_language")
+        cls._available_languages = cls.load_available_languages()
+
+    @classmethod
+    def load_available_languages(cls):
+        return [tuple(language) for language in cls._resources()["languages"]]
+
+    @classmethod
+    def load_translations(cls, language_code):
+        translations = cls._resources()["translations"]
+        # Im Bundle sind alle Sprachen bereits mit en_US aufgefüllt
+        return translations.get(language_code) or translations.get('en_US', {})
+
+    @classmethod
+    def get_translation(cls, key):
+        return cls.load_translations(cls._selected_language or 'en_US').get(key, f"[{key}]")
+
+    @classmethod
+    def save_language(cls, language_code):
+        cls._selected_language = language_code
+        config = ConfigManager.load_config()
+        
+        layout_name = "QWERTY"
+        for code, name, key_layout in cls._available_languages:
+            if code == language_code:
+                layout_name = key_layout
+                break
+        
+        try:
+            layout_mapping = KeyboardLayoutManager.load_layout(layout_name)
+        except Exception as e:
+            report_error("Error", f"Error loading layout: {e}")
+            layout_mapping = config.get("key_mapping", {})
+
+        ConfigManager.save_config({
+            "selected_language": language_code,
+            "keyboard_layout": layout_name,
+            "key_mapping": layout_mapping
+        })
+
+# -------------------------------
+# Config Manager
+# -------------------------------
+
+class ConfigManager:
+    DEFAULT_CONFIG = {
+        "key_press_durations": [0.2, 0.248, 0.3, 0.5, 1.0],
+        "speed_presets": [600, 800, 1000, 1200],
+        "selected_language": None,
+        "keyboard_layout": "QWERTZ",
+        "key_mapping": {
+            "Key0": "z", "Key1": "u", "Key2": "i", "Key3": "o",
+            "Key4": "p", "Key5": "h", "Key6": "j", "Key7": "k",
+            "Key8": "l", "Key9": "ö", "Key10": "n", "Key11": "m",
+            "Key12": ",", "Key13": ".", "Key14": "-"
+        },
+        "timing_config": {
+            "initial_delay": 1.2,
+            "pause_resume_delay": 0.6,
+            "ramp_time": 2.0,
+            "speed_change_time": 0.3,
+            "spin_threshold": 0.002,
+            "playlist_gap": 0.3
+        },
+        "pause_key": "#",
+        "input_backend": "auto",
+        "trace_playback": False,
+        "performance_mode": False,
+        "playback_cpu": None,
+        "record_bpm": 0
+    }
+
+    RELOAD_INTERVAL = 1.0
+    SAVE_DELAY = 0.5
+
+    _config = None
+    _stamp = None
+    _checked = 0.0
+    _dirty = False
+    _save_timer = None
+    _pause_key = "#"
+    _lock = Lock()
+
+    @staticmethod
+    def _file_stamp():
+        try:
+            stat = os.stat(SETTINGS_FILE)
+            return (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            return None
+
+    @classmethod
+    def _read_config(cls):
+        try:
+            with open(SETTINGS_FILE, 'r', encoding="utf-8") as file:
+                user_config = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            user_config = {}
+        
+        config = cls.DEFAULT_CONFIG.copy()
+        
+        for key, value in user_config.items():
+            if key == "timing_config" and isinstance(value, dict):
+                config[key] = {**config[key], **value}
+            elif key == "key_mapping" and isinstance(value, dict):
+                config[key] = {**config[key], **value}
+            else:
+                config[key] = value
+        
+        return config
+
+    @classmethod
+    def _set_config(cls, config):
+        cls._config = config
+        cls._pause_key = config.get("pause_key", "#")
+
+    @classmethod
+    def _refresh(cls):
+        # Datei nur alle RELOAD_INTERVAL Sekunden per mtime prüfen
+        now = time.monotonic()
+        if cls._config is not None and now - cls._checked < cls.RELOAD_INTERVAL:
+            return
+        cls._checked = now
+        stamp = cls._file_stamp()
+        if cls._config is None or (stamp != cls._stamp and not cls._dirty):
+            cls._set_config(cls._read_config())
+            cls._stamp = stamp
+
+    @classmethod
+    def load_config(cls):
+        """Returns the shared, cached config - treat it as read-only."""
+        with cls._lock:
+            cls._refresh()
+            return cls._config
+
+    @classmethod
+    def get_pause_key(cls):
+        with cls._lock:
+            cls._refresh()
+            return cls._pause_key
+
+    @classmethod
+    def save_config(cls, config_data):
+        with cls._lock:
+            cls._refresh()
+            current_config = dict(cls._config)
+            
+            for key, value in config_data.items():
+                if key in ["timing_config", "key_mapping"] and isinstance(value, dict):
+                    current_config[key] = {**current_config.get(key, {}), **value}
+                else:
+                    current_config[key] = value
+
+            cls._set_config(current_config)
+            cls._dirty = True
+            if cls._save_timer is None:
+                cls._save_timer = threading.Timer(cls.SAVE_DELAY, cls.flush)
+                cls._save_timer.daemon = True
+                cls._save_timer.start()
+
+    @classmethod
+    def flush(cls):
+        with cls._lock:
+            if cls._save_timer is not None:
+                cls._save_timer.cancel()
+                cls._save_timer = None
+            if not cls._dirty:
+                return
+            os.makedirs(os.path.dirname(SETTINGS_FILE), exist_ok=True)
+            tmp_file = f"{SETTINGS_FILE}.{os.getpid()}.tmp"
+            with open(tmp_file, 'w', encoding="utf-8") as file:
+                json.dump(cls._config, file, indent=3, ensure_ascii=False)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(tmp_file, SETTINGS_FILE)
+            cls._stamp = cls._file_stamp()
+            cls._dirty = False
+
+atexit.register(ConfigManager.flush)
+
+# -------------------------------
+# KeyboardLayoutManager
+# -------------------------------        
+
+class KeyboardLayoutManager:
+    @classmethod
+    def load_layout(cls, layout_name):
+        mapping = LM._resources()["layouts"].get(layout_name.casefold())
+        if mapping is None:
+            raise Exception(f"Error loading layout '{layout_name}': layout not found")
+        return dict(mapping)
+
+# -------------------------------
+# Music Player
+# -------------------------------
+
+class MusicPlayer:
+    def __init__(self, backend=None):
+        self.state = PlaybackState()
+        self.play_thread = None
+        self.loader = SongLoader()
+        self.song_cache = SongCache()
+        self.sky_process = SkyProcessTracker()
+        self.sky_window = SkyWindowTracker(self.sky_process)
+        
+        config = ConfigManager.load_config()
+        self.key_map = self._create_key_map(config["key_mapping"])
+        self.backend = backend or create_backend(config.get("input_backend", "auto"), config["key_mapping"])
+        self.releaser = KeyReleaseScheduler(self.backend.press_keys, self.backend.release_keys)
+        self.press_duration = 0.1
+        self.speed = 1000
+        self.keypress_enabled = False
+        self.speed_enabled = False
+        
+        timing_config = config.get("timing_config", {})
+        self.initial_delay = timing_config.get("initial_delay", 1.2)
+        self.pause_resume_delay = timing_config.get("pause_resume_delay", 0.6)
+        self.ramp_time_ns = int(timing_config.get("ramp_time", 2.0) * 1e9)
+        self.speed_change_ns = int(timing_config.get("speed_change_time", 0.3) * 1e9)
+        self.spin_threshold_ns = int(timing_config.get("spin_threshold", 0.002) * 1e9)
+        self.trace_playback = config.get("trace_playback", False)
+        self.performance_mode = config.get("performance_mode", False)
+        self.playback_cpu = config.get("playback_cpu")
+        self.performance_applied = {}
+        self.playlist_gap = timing_config.get("playlist_gap", 0.3)
+        self.playlist_errors = []
+        self.current_path = None
+        # Vom Benutzer übergebene Dateien (Kommandozeile, zweiter Start) - auch außerhalb des App-Ordners
+        self.trusted_paths = set()
+        self.metrics = PlaybackMetrics()
+        self.require_sky = True
+        
+        self.speed_lock = Lock()
+        self.current_speed = 1000
+        self._seek_ns = None
+        self.position_ns = 0
+        self.duration_ns = 0
+
+    def _create_key_map(self, mapping):
+        key_map = {}
+        for prefix in ['', '1', '2', '3']:
+            for key, value in mapping.items():
+                key_map[f"{prefix}{key}".lower()] = value
+        return key_map
+
+    def find_sky_window(self):
+        # Linux: X11 und Wayland
+        return self.sky_window.find()
+
+    def focus_window(self, window):
+        return self.sky_window.focus(window)
+
+    @staticmethod
+    def _checked_path(path):
+        # Bei Archiv-Mitgliedern wird das Archiv selbst geprüft
+        archive, member = split_archive_path(path)
+        return (archive if archive is not None else path).resolve(), member
+
+    def trust_paths(self, paths):
+        """Allows paths the user handed over explicitly, wherever they are."""
+        for path in paths:
+            self.trusted_paths.add(self._checked_path(Path(path))[0])
+
+    def check_song_path(self, path):
+        path = Path(path)
+        checked, member = self._checked_path(path)
+        if checked not in self.trusted_paths and not checked.as_posix().startswith(Path.cwd().as_posix()):
+            raise ValueError(LM.get_translation('security_error_path'))
+        if member is not None and not is_safe_member(member):
+            raise ValueError(LM.get_translation('security_error_path'))
+
+        if path.suffix.lower() not in SONG_SUFFIXES:
+            raise ValueError(LM.get_translation('invalid_file_format'))
+        return path
+
+    def parse_song(self, path):
+        return self.loader.load(self.check_song_path(path))
+
+    def load_song(self, path):
+        path = self.check_song_path(path)
+        try:
+            key = self.song_cache.cache_key(path, self.loader.stamp(path), self.key_map)
+        except (OSError, KeyError):
+            key = None
+        song = self.song_cache.get(key) if key else None
+        if song is None:
+            song = self.compile_song(self.loader.load(path))
+            if key:
+                try:
+                    self.song_cache.put(key, song)
+                except OSError:
+                    pass
+        return song
+
+    def compile_song(self, song_data):
+        return compile_song(song_data, self.key_map)
+
+    def _performance_section(self):
+        if not self.performance_mode:
+            return nullcontext({})
+        return performance_mode(self.playback_cpu)
+
+    @staticmethod
+    def _ramp_start(speed):
+        # Anlauf mit halbem Tempo, aber nie langsamer als 500
+        return max(500, speed * 0.5)
+
+    def play_chord(self, keys):
+        self.releaser.press(keys, int(self.press_duration * 1e9))
+
+    def play_song(self, song, start_ns=None, ramp=True, finish=True, position_ns=0):
+        """Plays a compiled song from position_ns (song time after the first chord).
+
+        Returns the deadline of its last chord, or None if cut short.
+        """
+        if not len(song):
+            report_error(LM.get_translation("error_title"), LM.get_translation("missing_song_notes"))
+            return
+
+        if self.require_sky:
+            if not self.sky_process.is_running():
+                report_error(LM.get_translation("error_title"), LM.get_translation("sky_not_running"))
+                return
+            self.sky_process.watch()
+            sky_exited = self.sky_process.exited
+        else:
+            sky_exited = threading.Event()
+
+        trace_path = None
+        if self.trace_playback:
+            trace_path = os.path.join(TRACE_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}.csv")
+        metrics = self.metrics
+        metrics.reset(song.note_count, song.unmapped, trace_path)
+        metrics.active = True
+        
+        times = song.times_ns
+        chord_ids = song.chord_ids
+        chords = song.chords
+
+        with self.speed_lock:
+            target_speed = self.current_speed
+            self._seek_ns = None
+        self.duration_ns = song.duration_ns
+        self.position_ns = max(0, min(position_ns, self.duration_ns))
+
+        # GC-Lauf und Priorität vor dem Startzeitpunkt, nicht mitten im ersten Akkord
+        with self._performance_section() as applied:
+            self.performance_applied = applied
+            # Songzeit -> Wandzeit; Deadlines sind absolut, Verspätungen werden aufgeholt statt aufsummiert
+            start_song = times[0] + self.position_ns
+            start_wall = start_ns if start_ns is not None else time.monotonic_ns()
+            warp = TimeWarp(start_song, start_wall, target_speed)
+            if ramp:
+                warp.set_speed(target_speed, start_wall, self.ramp_time_ns, self._ramp_start(target_speed))
+            deadline = start_wall
+            resume_at = None
+
+            state = self.state
+            i = song.index_at(start_song)
+            while i < len(times):
+                if state.stopped or sky_exited.is_set():
+                    break
+                
+                if state.paused:
+                    # Position im Song merken, damit der Rest nach dem Fortsetzen im Takt bleibt
+                    if resume_at is None:
+                        resume_at = min(times[i], max(times[i - 1] if i else times[0],
+                                                      warp.song_time(time.monotonic_ns())))
+                    if not state.wait_resumed():
+                        break
+                    # Tempo/Sprung (nudge) weckt auch auf - dann den Rest der Verzögerung abwarten
+                    delay_end = time.monotonic_ns() + int(self.pause_resume_delay * 1e9)
+                    while not (state.paused or state.stopped):
+                        remaining = delay_end - time.monotonic_ns()
+                        if remaining <= 0:
+                            break
+                        state.wait(remaining / 1e9)
+                    if state.paused or state.stopped:
+                        continue
+
+                    with self.speed_lock:
+                        target_speed = self.current_speed
+                        seek_ns, self._seek_ns = self._seek_ns, None
+                    if seek_ns is not None:
+                        resume_at = times[0] + seek_ns
+                        i = song.index_at(resume_at)
+                        self.position_ns = seek_ns
+                    now = time.monotonic_ns()
+                    warp.rebase(resume_at, now, target_speed)
+                    warp.set_speed(target_speed, now, self.ramp_time_ns, self._ramp_start(target_speed))
+                    resume_at = None
+            
+                with self.speed_lock:
+                    target_speed = self.current_speed
+                    seek_ns, self._seek_ns = self._seek_ns, None
+                if seek_ns is not None:
+                    # Sprung: gehaltene Tasten loslassen und ab der neuen Position weiterzählen
+                    self.releaser.release_all()
+                    seek_song = times[0] + seek_ns
+                    i = song.index_at(seek_song)
+                    self.position_ns = seek_ns
+                    warp.rebase(seek_song, time.monotonic_ns(), target_speed)
+                    continue
+                if target_speed != warp.target_speed:
+                    warp.set_speed(target_speed, time.monotonic_ns(), self.speed_change_ns)
+
+                song_ns = times[i]
+                deadline = warp.wall_time(song_ns)
+                if wait_until(deadline, state, self.spin_threshold_ns):
+                    continue
+                keys = chords[chord_ids[i]]
+                metrics.record(deadline, time.monotonic_ns(), len(keys), warp.speed_at(song_ns))
+                self.play_chord(keys)
+                self.position_ns = song_ns - times[0]
+                i += 1
+
+        self.sky_process.stop_watch()
+        metrics.active = False
+        try:
+            metrics.write_trace()
+        except OSError:
+            pass
+        if sky_exited.is_set():
+            self.releaser.release_all()
+            report_error(LM.get_translation("error_title"), LM.get_translation("sky_not_running"))
+            return None
+        if i < len(times):
+            return None
+
+        if finish:
+            self.finish_playback()
+        return deadline
+
+    def finish_playback(self):
+        # Linux: System Bell
+        print('\a', end='', flush=True)
+        time.sleep(0.5)
+
+    def _prefetch(self, path):
+        try:
+            song = self.load_song(path)
+            if not len(song):
+                raise ValueError(LM.get_translation("missing_song_notes"))
+            return path, song, None
+        except Exception as e:
+            return path, None, e
+
+    def playlist_error_text(self):
+        lines = [f"{Path(path).name}: {error}" for path, error in self.playlist_errors]
+        return LM.get_translation("playlist_errors_message") + "\n\n" + "\n".join(lines)
+
+    def prepare_playlist(self, playlist):
+        """Restarts the queue and loads its first playable song, collecting failures in playlist_errors.
+
+        Returns (path, song), or None if no song in the queue can be played.
+        """
+        playlist.reset()
+        self.playlist_errors = []
+        for _ in range(len(playlist)):
+            path = playlist.next_path()
+            if path is None:
+                break
+            path, song, error = self._prefetch(path)
+            if song is not None:
+                return path, song
+            self.playlist_errors.append((path, error))
+        return None
+
+    def _wait_prefetch(self, pending):
+        # Stop muss auch hier greifen, sonst spielt die Playlist nach dem Laden einfach weiter
+        while not futures_wait([pending], timeout=0.05).done:
+            if self.state.stopped:
+                return None
+        return pending.result()
+
+    def play_playlist(self, playlist, first=None, start_ns=None):
+        """Plays the queue gaplessly; the next song is loaded and compiled while the current one plays.
+
+        first is the result of prepare_playlist(); without it the first song is loaded here.
+        """
+        if first is None:
+            first = self.prepare_playlist(playlist)
+            if first is None:
+                report_error(LM.get_translation("error_title"), self.playlist_error_text())
+                return
+        gap_ns = int(self.playlist_gap * 1e9)
+        ramp = True
+        failures = 0
+
+        pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="prefetch")
+        try:
+            def prefetch_next():
+                path = playlist.next_path()
+                return pool.submit(self._prefetch, path) if path is not None else None
+
+            path, song = first
+            error = None
+            pending = prefetch_next()
+            while not self.state.stopped:
+                if song is None:
+                    self.playlist_errors.append((path, error))
+                    failures += 1
+                    # Bei Wiederholung nicht endlos über kaputte Songs kreisen
+                    if failures >= len(playlist):
+                        break
+                else:
+                    failures = 0
+                    self.current_path = path
+                    end_ns = self.play_song(song, start_ns=start_ns, ramp=ramp, finish=False)
+                    if end_ns is None:
+                        break
+                    start_ns = end_ns + gap_ns
+                    ramp = False
+                if pending is None:
+                    break
+                result = self._wait_prefetch(pending)
+                if result is None:
+                    break
+                path, song, error = result
+                pending = prefetch_next()
+        finally:
+            # Nicht auf ein noch ladendes Lied warten - Stop soll sofort durchgreifen
+            pool.shutdown(wait=False, cancel_futures=True)
+
+        self.current_path = None
+        if not self.state.stopped:
+            self.finish_playback()
+            if self.playlist_errors:
+                report_error(LM.get_translation("error_title"), self.playlist_error_text())
+
+    def stop_playback(self):
+        self.state.stop()
+        if self.play_thread and self.play_thread.is_alive():
+            self.play_thread.join(timeout=1.0)
+        self.releaser.release_all()
+        # Läuft der Thread noch, bliebe er nach einem Reset einfach weiter aktiv
+        if not (self.play_thread and self.play_thread.is_alive()):
+            self.state.reset()
+
+    def pause(self):
+        self.state.pause()
+
+    def resume(self):
+        self.state.resume()
+
+    def seek(self, position_ns):
+        """Jumps to position_ns (song time after the first chord) - while playing or paused."""
+        with self.speed_lock:
+            self._seek_ns = max(0, min(int(position_ns), self.duration_ns))
+        self.state.nudge()
+
+    def seek_fraction(self, fraction):
+        self.seek(self.duration_ns * min(1.0, max(0.0, fraction)))
+
+    def set_speed(self, speed):
+        with self.speed_lock:
+            self.current_speed = speed
+        self.state.nudge()
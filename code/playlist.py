@@ -0,0 +1,63 @@
+# Copyright (C) 2025 VanilleIce
+# This program is licensed under the GNU AGPLv3. See LICENSE for details.
+# Source code: https://github.com/VanilleIce/ProjectLyrica_Linux
+
+import random
+import threading
+
+
+class Playlist:
+    """Song queue with shuffle and repeat; next_path() hands out the play order."""
+
+    def __init__(self, paths=None, shuffle=False, repeat=False):
+        self.paths = list(paths or [])
+        self.shuffle = shuffle
+        self.repeat = repeat
+        self._order = []
+        self._position = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.paths)
+
+    def add(self, *paths):
+        with self._lock:
+            self.paths.extend(paths)
+
+    def remove(self, index):
+        with self._lock:
+            del self.paths[index]
+
+    def move(self, index, offset):
+        with self._lock:
+            target = index + offset
+            if 0 <= index < len(self.paths) and 0 <= target < len(self.paths):
+                self.paths[index], self.paths[target] = self.paths[target], self.paths[index]
+                return target
+            return index
+
+    def clear(self):
+        with self._lock:
+            self.paths.clear()
+            self._order = []
+            self._position = 0
+
+    def _build_order(self):
+        self._order = list(self.paths)
+        if self.shuffle:
+            random.shuffle(self._order)
+        self._position = 0
+
+    def reset(self):
+        with self._lock:
+            self._build_order()
+
+    def next_path(self):
+        with self._lock:
+            if self._position >= len(self._order):
+                if not self.repeat or not self.paths:
+                    return None
+                self._build_order()
+            path = self._order[self._position]
+            self._position += 1
+            return path
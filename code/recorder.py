@@ -0,0 +1,118 @@
+# Copyright (C) 2025 VanilleIce
+# This program is licensed under the GNU AGPLv3. See LICENSE for details.
+# Source code: https://github.com/VanilleIce/ProjectLyrica_Linux
+
+import json
+import time
+from array import array
+
+DEFAULT_CAPACITY = 1 << 16
+DEFAULT_SUBDIVISION = 4
+
+
+class KeyRecorder:
+    """Records mapped key presses into a preallocated ring buffer.
+
+    press() runs on the keyboard listener thread for every key event. It takes
+    the timestamp first and then only does a dict lookup and two array stores,
+    so fast trills keep their spacing. Held keys are ignored until released,
+    which filters out autorepeat. When the buffer is full, the oldest notes are
+    overwritten.
+    """
+
+    def __init__(self, key_mapping, capacity=DEFAULT_CAPACITY):
+        # Zweierpotenz, damit der Ringindex nur eine Maske braucht
+        self.capacity = 1 << max(1, capacity - 1).bit_length()
+        self._mask = self.capacity - 1
+        self._times = array("q", bytes(8 * self.capacity))
+        self._keys = array("B", bytes(self.capacity))
+        self._count = 0
+        self._held = set()
+        self.recording = False
+        self.set_mapping(key_mapping)
+
+    def set_mapping(self, key_mapping):
+        """Reverse map: typed character -> N of "KeyN"."""
+        reverse = {}
+        for key_id, char in key_mapping.items():
+            number = key_id[3:]
+            if not (key_id.startswith("Key") and number.isdigit() and char):
+                continue
+            for variant in (char, char.lower(), char.upper()):
+                reverse.setdefault(variant, int(number))
+        self._reverse = reverse
+
+    def __len__(self):
+        return min(self._count, self.capacity)
+
+    @property
+    def dropped(self):
+        return max(0, self._count - self.capacity)
+
+    def start(self):
+        self._count = 0
+        self._held.clear()
+        self.recording = True
+
+    def press(self, key, perf_counter_ns=time.perf_counter_ns):
+        """Returns True if key is a note key and was recorded."""
+        stamp = perf_counter_ns()
+        index = self._reverse.get(getattr(key, "char", None))
+        if index is None or index in self._held:
+            return False
+        self._held.add(index)
+        slot = self._count & self._mask
+        self._times[slot] = stamp
+        self._keys[slot] = index
+        self._count += 1
+        return True
+
+    def release(self, key):
+        index = self._reverse.get(getattr(key, "char", None))
+        if index is not None:
+            self._held.discard(index)
+
+    def stop(self):
+        self.recording = False
+        return self.notes()
+
+    def notes(self):
+        """Recorded (time_ms, key_number) pairs, relative to the first note."""
+        count = self._count
+        if not count:
+            return []
+        mask = self._mask
+        slots = [i & mask for i in range(max(0, count - self.capacity), count)]
+        origin = self._times[slots[0]]
+        return [((self._times[slot] - origin) / 1e6, self._keys[slot]) for slot in slots]
+
+
+def quantize(notes, bpm, subdivision=DEFAULT_SUBDIVISION):
+    """Snaps note times to a grid of subdivision steps per beat."""
+    step = 60000 / bpm / subdivision
+    return [(round(round(t / step) * step), key) for t, key in notes]
+
+
+def build_sheet(notes, name, bpm=None, subdivision=DEFAULT_SUBDIVISION, author=""):
+    """Sheet in the Sky Studio JSON shape that parse_song reads (a one-song list)."""
+    if bpm:
+        notes = quantize(notes, bpm, subdivision)
+    else:
+        notes = [(round(t), key) for t, key in notes]
+    song_notes = [{"time": t, "key": f"1Key{key}"} for t, key in sorted(dict.fromkeys(notes))]
+    return [{
+        "name": name,
+        "author": author,
+        "transcribedBy": "Project Lyrica",
+        "isComposed": True,
+        "bpm": bpm or 120,
+        "bitsPerPage": 16,
+        "pitchLevel": 0,
+        "isEncrypted": False,
+        "songNotes": song_notes,
+    }]
+
+
+def write_sheet(path, sheet):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(sheet, f, ensure_ascii=False)
@@ -0,0 +1,131 @@
+# Copyright (C) 2025 VanilleIce
+# This program is licensed under the GNU AGPLv3. See LICENSE for details.
+# Source code: https://github.com/VanilleIce/ProjectLyrica_Linux
+
+"""All translations, the language list and the keyboard layouts in one JSON file.
+
+The bundle is rebuilt whenever an XML file under resources/ was added, removed
+or changed since it was written, so startup costs one read plus a few stat()
+calls instead of an ElementTree parse per file. Build it ahead of time with
+
+    python3 code/resource_bundle.py [--output PATH]
+"""
+
+import argparse
+import json
+import os
+import sys
+import xml.etree.ElementTree as ET
+
+BUNDLE_VERSION = 1
+BUNDLE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "ProjectLyrica", f"resources-v{BUNDLE_VERSION}.json")
+RESOURCE_DIR = "resources"
+FALLBACK_LANGUAGE = "en_US"
+
+
+def _sources(resource_dir):
+    """{relative path: mtime_ns} of every XML file the bundle is built from."""
+    sources = {}
+    lang_file = os.path.join(resource_dir, "config", "lang.xml")
+    try:
+        sources["config/lang.xml"] = os.stat(lang_file).st_mtime_ns
+    except OSError:
+        pass
+    for sub in ("lang", "layouts"):
+        try:
+            entries = os.scandir(os.path.join(resource_dir, sub))
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                if entry.name.endswith(".xml") and entry.is_file():
+                    sources[f"{sub}/{entry.name}"] = entry.stat().st_mtime_ns
+    return sources
+
+
+def build_bundle(resource_dir=RESOURCE_DIR):
+    sources = _sources(resource_dir)
+
+    languages = []
+    if "config/lang.xml" in sources:
+        for lang in ET.parse(os.path.join(resource_dir, "config", "lang.xml")).findall("language"):
+            code = lang.get("code")
+            if code and lang.text:
+                languages.append((code, lang.text, lang.get("key_layout", "QWERTY")))
+
+    translations = {}
+    layouts = {}
+    for name in sorted(sources):
+        sub, filename = name.split("/", 1)
+        stem = filename[:-len(".xml")]
+        path = os.path.join(resource_dir, sub, filename)
+        if sub == "lang":
+            tree = ET.parse(path)
+            translations[stem] = {t.get("key"): t.text for t in tree.findall("translation")
+                                  if t.get("key") and t.text}
+        elif sub == "layouts":
+            mapping = {}
+            for key in ET.parse(path).getroot().findall("key"):
+                key_value = key.text.strip() if key.text else ""
+                if key.get("id") and key_value:
+                    mapping[key.get("id")] = key_value
+            layouts[stem.casefold()] = mapping
+
+    # Fehlende Texte schon beim Bauen mit Englisch auffüllen - zur Laufzeit genügt ein Dict-Zugriff
+    fallback = translations.get(FALLBACK_LANGUAGE, {})
+    for code, table in translations.items():
+        if code != FALLBACK_LANGUAGE:
+            translations[code] = {**fallback, **table}
+
+    return {
+        "version": BUNDLE_VERSION,
+        "resource_dir": os.path.abspath(resource_dir),
+        "sources": sources,
+        "languages": languages,
+        "translations": translations,
+        "layouts": layouts,
+    }
+
+
+def write_bundle(bundle, bundle_path=BUNDLE_PATH):
+    os.makedirs(os.path.dirname(bundle_path), exist_ok=True)
+    tmp = f"{bundle_path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(bundle, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp, bundle_path)
+
+
+def load_bundle(resource_dir=RESOURCE_DIR, bundle_path=BUNDLE_PATH):
+    """Returns the current bundle, rebuilding (and trying to save) it if any source changed."""
+    try:
+        with open(bundle_path, "rb") as f:
+            bundle = json.loads(f.read())
+        if (bundle.get("version") == BUNDLE_VERSION
+                and bundle.get("resource_dir") == os.path.abspath(resource_dir)
+                and bundle.get("sources") == _sources(resource_dir)):
+            return bundle
+    except (OSError, ValueError, AttributeError):
+        pass
+
+    bundle = build_bundle(resource_dir)
+    try:
+        write_bundle(bundle, bundle_path)
+    except OSError:
+        pass
+    return bundle
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compile translations and layouts into one bundle")
+    parser.add_argument("--resources", default=RESOURCE_DIR, help="resources directory")
+    parser.add_argument("--output", default=BUNDLE_PATH, help="bundle file")
+    args = parser.parse_args(argv)
+
+    bundle = build_bundle(args.resources)
+    write_bundle(bundle, args.output)
+    print(f"{args.output}: {len(bundle['translations'])} languages, {len(bundle['layouts'])} layouts")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
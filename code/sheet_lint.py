@@ -0,0 +1,240 @@
+# Copyright (C) 2025 VanilleIce
+# This program is licensed under the GNU AGPLv3. See LICENSE for details.
+# Source code: https://github.com/VanilleIce/ProjectLyrica_Linux
+
+"""Batch validator for song sheets - a directory tree, a zip, or single files.
+
+    python3 code/sheet_lint.py                      # resources/Songs
+    python3 code/sheet_lint.py Songs.zip --quiet --json report.json
+
+Every sheet is checked in a process pool. Per file you get errors (the sheet
+cannot be played), warnings (it plays, but maybe not as written) and
+statistics. Sheets with the same note stream are reported as duplicates, and
+sheets with the same key sequence but different timing as near-duplicates.
+Exit status is 1 if any sheet has errors.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from song_loader import SongLoader, SONG_SUFFIXES, ARCHIVE_SUFFIX
+
+DEFAULT_ROOT = os.path.join("resources", "Songs")
+LAYOUT_DIR = os.path.join("resources", "layouts")
+MIN_GAP_WARN_MS = 10
+MAX_SIZE_WARN = 2 * 1024 * 1024
+
+# Wie MusicPlayer._create_key_map: Key-IDs mit optionalem Instrument-Präfix
+_KEY_RE = re.compile(r"^[123]?(key\d+)$")
+
+_loader = None
+
+
+def layout_key_ids(layout="QWERTY"):
+    tree = ET.parse(os.path.join(LAYOUT_DIR, f"{layout}.xml"))
+    return frozenset(key.get("id").lower() for key in tree.getroot().findall("key") if key.get("id"))
+
+
+def collect_paths(targets, loader):
+    """Expands directories and zips into individual sheet paths (zip members as archive/member)."""
+    paths = []
+    for target in targets:
+        if os.path.isdir(target):
+            for dirpath, _, filenames in os.walk(target):
+                for filename in sorted(filenames):
+                    lower = filename.lower()
+                    if lower.endswith(SONG_SUFFIXES) or lower.endswith(ARCHIVE_SUFFIX):
+                        paths.extend(collect_paths([os.path.join(dirpath, filename)], loader))
+        elif target.lower().endswith(ARCHIVE_SUFFIX):
+            paths.extend(os.path.join(target, info.filename)
+                         for info in sorted(loader.members(target), key=lambda info: info.filename))
+        else:
+            paths.append(target)
+    return paths
+
+
+def lint_sheet(raw: bytes, key_ids) -> dict:
+    """Checks one sheet. Returns errors, warnings, stats and the two note-stream hashes."""
+    errors, warnings, stats = [], [], {}
+    result = {"errors": errors, "warnings": warnings, "stats": stats}
+
+    if raw[:2] in (b"\xff\xfe", b"\xfe\xff"):
+        stats["encoding"] = "utf-16"
+        warnings.append("UTF-16 encoded")
+    else:
+        stats["encoding"] = "utf-8-sig" if raw[:3] == b"\xef\xbb\xbf" else "utf-8"
+    if len(raw) > MAX_SIZE_WARN:
+        warnings.append(f"large file ({len(raw) // 1024} KiB)")
+
+    try:
+        data = json.loads(raw.decode("utf-16" if stats["encoding"] == "utf-16" else "utf-8-sig"))
+    except (UnicodeDecodeError, ValueError) as e:
+        errors.append(f"not valid JSON: {e}")
+        return result
+    if isinstance(data, list):
+        if len(data) > 1:
+            warnings.append(f"{len(data)} songs in one file, only the first is played")
+        data = data[0] if data else None
+    if not isinstance(data, dict):
+        errors.append("no song object")
+        return result
+
+    stats["name"] = str(data.get("name") or "")
+    if not stats["name"]:
+        warnings.append("missing name")
+    if data.get("isEncrypted"):
+        errors.append("encrypted sheet")
+        return result
+    notes = data.get("songNotes")
+    if not isinstance(notes, list):
+        errors.append("songNotes missing or not a list")
+        return result
+
+    events = []
+    bad = unmapped = backwards = 0
+    previous = None
+    for note in notes:
+        try:
+            note_time = int(note["time"])
+            key = str(note["key"]).lower()
+        except (KeyError, TypeError, ValueError):
+            bad += 1
+            continue
+        match = _KEY_RE.match(key)
+        if not match or match.group(1) not in key_ids:
+            unmapped += 1
+            continue
+        if previous is not None and note_time < previous:
+            backwards += 1
+        previous = note_time
+        events.append((note_time, match.group(1)))
+
+    if bad:
+        warnings.append(f"{bad} notes without usable time/key")
+    if unmapped:
+        warnings.append(f"{unmapped} notes with keys no layout maps")
+    if backwards:
+        warnings.append(f"time goes backwards {backwards}x")
+    if not events:
+        errors.append("no playable notes")
+        return result
+    if any(t < 0 for t, _ in events):
+        warnings.append("negative note times")
+
+    events.sort()
+    unique = sorted(set(events))
+    if len(unique) != len(events):
+        warnings.append(f"{len(events) - len(unique)} duplicate notes")
+    times = sorted({t for t, _ in unique})
+    gaps = [b - a for a, b in zip(times, times[1:])]
+    min_gap = min(gaps) if gaps else None
+    if min_gap is not None and min_gap < MIN_GAP_WARN_MS:
+        warnings.append(f"chords only {min_gap} ms apart")
+
+    stats.update(
+        notes=len(events),
+        chords=len(times),
+        duration_ms=times[-1] - times[0],
+        min_gap_ms=min_gap,
+        bpm=data.get("bpm"),
+    )
+
+    # Normalisierter Notenstrom: Zeiten relativ zum ersten Akkord, Präfixe entfernt
+    origin = times[0]
+    stream = "".join(f"{t - origin}:{key};" for t, key in unique)
+    result["note_hash"] = hashlib.blake2b(stream.encode(), digest_size=12).hexdigest()
+    chord_keys = {}
+    for t, key in unique:
+        chord_keys.setdefault(t, []).append(key)
+    sequence = "|".join(",".join(keys) for keys in chord_keys.values())
+    result["key_hash"] = hashlib.blake2b(sequence.encode(), digest_size=12).hexdigest()
+    return result
+
+
+def _lint_path(args):
+    global _loader
+    path, key_ids = args
+    if _loader is None:
+        _loader = SongLoader()
+    try:
+        raw, _ = _loader.read(path)
+    except Exception as e:
+        result = {"errors": [f"unreadable: {e}"], "warnings": [], "stats": {}}
+    else:
+        result = lint_sheet(raw, key_ids)
+    result["path"] = path
+    return result
+
+
+def find_duplicates(results):
+    """Groups paths by note_hash (exact) and key_hash (same keys, different timing)."""
+    by_notes, by_keys = {}, {}
+    for result in results:
+        if "note_hash" in result:
+            by_notes.setdefault(result["note_hash"], []).append(result["path"])
+            by_keys.setdefault(result["key_hash"], set()).add(result["note_hash"])
+    exact = [paths for paths in by_notes.values() if len(paths) > 1]
+    near = []
+    for note_hashes in by_keys.values():
+        if len(note_hashes) > 1:
+            near.append(sorted(path for h in note_hashes for path in by_notes[h]))
+    return exact, near
+
+
+def lint_paths(paths, key_ids, workers=None):
+    jobs = [(path, key_ids) for path in paths]
+    if workers == 1 or len(jobs) < 2:
+        return [_lint_path(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_lint_path, jobs, chunksize=max(1, len(jobs) // ((workers or os.cpu_count() or 1) * 4))))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Validate song sheets")
+    parser.add_argument("targets", nargs="*", default=[DEFAULT_ROOT], help="directories, zips or sheet files")
+    parser.add_argument("--layout", default="QWERTY", help="layout whose key ids count as mapped")
+    parser.add_argument("--workers", type=int, help="worker processes (default: all cores)")
+    parser.add_argument("--quiet", action="store_true", help="only list files with errors")
+    parser.add_argument("--json", dest="json_path", help="write the full report to this file")
+    args = parser.parse_args(argv)
+
+    paths = collect_paths(args.targets, SongLoader())
+    results = lint_paths(paths, layout_key_ids(args.layout), args.workers)
+    exact, near = find_duplicates(results)
+
+    failed = 0
+    for result in results:
+        if result["errors"]:
+            failed += 1
+        elif args.quiet or not result["warnings"]:
+            continue
+        status = "ERROR" if result["errors"] else "warn "
+        print(f"{status} {result['path']}: {'; '.join(result['errors'] + result['warnings'])}")
+    if not args.quiet:
+        for label, groups in (("duplicate", exact), ("near-duplicate", near)):
+            for group in groups:
+                print(f"{label}: " + " == ".join(group))
+
+    ok = [result for result in results if "note_hash" in result]
+    print(f"{len(results)} sheets, {failed} with errors, "
+          f"{sum(1 for result in results if result['warnings'])} with warnings, "
+          f"{sum(result['stats']['notes'] for result in ok)} notes, "
+          f"{len(exact)} duplicate and {len(near)} near-duplicate groups")
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump({"sheets": results, "duplicates": exact, "near_duplicates": near},
+                      f, indent=2, ensure_ascii=False)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
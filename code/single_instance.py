@@ -0,0 +1,120 @@
+# Copyright (C) 2025 VanilleIce
+# This program is licensed under the GNU AGPLv3. See LICENSE for details.
+# Source code: https://github.com/VanilleIce/ProjectLyrica_Linux
+
+"""Single-instance guard: an fcntl lock plus a Unix socket for handing over launches.
+
+Only stdlib imports here - a second launch must be able to forward its
+arguments and exit before Tk or the player are ever loaded.
+"""
+
+import fcntl
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+
+RUNTIME_DIR = os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+
+
+class InstanceLock:
+    def __init__(self, name="ProjectLyrica", runtime_dir=RUNTIME_DIR):
+        base = os.path.join(runtime_dir, f"{name}-{os.getuid()}")
+        self.lock_path = base + ".lock"
+        self.socket_path = base + ".app.sock"
+        self._lock_fd = None
+        self._server = None
+        self._handler = None
+        self._pending = []
+        self._mutex = threading.Lock()
+
+    def acquire(self):
+        """True if this process is now the only instance. The kernel drops the lock when it exits."""
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode())
+        self._lock_fd = fd
+        self._listen()
+        return True
+
+    def _listen(self):
+        # Wir halten den Lock, ein übrig gebliebener Socket ist also sicher verwaist
+        try:
+            os.unlink(self.socket_path)
+        except FileNotFoundError:
+            pass
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(self.socket_path)
+        os.chmod(self.socket_path, 0o600)
+        server.listen(8)
+        self._server = server
+        threading.Thread(target=self._accept_loop, daemon=True).start()
+
+    def _accept_loop(self):
+        while True:
+            try:
+                conn, _ = self._server.accept()
+            except OSError:
+                return
+            with conn:
+                try:
+                    conn.settimeout(1.0)
+                    with conn.makefile("rb") as f:
+                        message = json.loads(f.readline())
+                    paths = [str(p) for p in message.get("paths", [])]
+                    conn.sendall(b'{"ok": true}\n')
+                except (OSError, ValueError, AttributeError):
+                    continue
+            self._deliver(paths)
+
+    def _deliver(self, paths):
+        with self._mutex:
+            handler = self._handler
+            if handler is None:
+                self._pending.append(paths)
+                return
+        handler(paths)
+
+    def set_handler(self, handler):
+        """handler(paths) runs on the listener thread; launches received before this are replayed."""
+        with self._mutex:
+            self._handler = handler
+            pending, self._pending = self._pending, []
+        for paths in pending:
+            handler(paths)
+
+    def forward(self, paths, timeout=2.0):
+        """Hands paths to the running instance; retries while it is still starting up."""
+        request = json.dumps({"paths": [os.path.abspath(p) for p in paths]}).encode("utf-8") + b"\n"
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                    sock.settimeout(max(0.1, deadline - time.monotonic()))
+                    sock.connect(self.socket_path)
+                    sock.sendall(request)
+                    with sock.makefile("rb") as f:
+                        return bool(json.loads(f.readline()).get("ok"))
+            except (OSError, ValueError):
+                if time.monotonic() >= deadline:
+                    return False
+                time.sleep(0.02)
+
+    def release(self):
+        if self._server is not None:
+            self._server.close()
+            self._server = None
+            try:
+                os.unlink(self.socket_path)
+            except OSError:
+                pass
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
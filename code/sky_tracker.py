@@ -0,0 +1,257 @@
+# Copyright (C) 2025 VanilleIce
+# This program is licensed under the GNU AGPLv3. See LICENSE for details.
+# Source code: https://github.com/VanilleIce/ProjectLyrica_Linux
+
+import os
+import subprocess
+import threading
+import time
+
+import psutil
+
+try:
+    from Xlib import display, X, Xatom
+    X11_AVAILABLE = True
+except ImportError:
+    X11_AVAILABLE = False
+
+SKY_PROCESS_NAMES = ("sky.exe", "sky")
+SKY_WINDOW_TITLE = "Sky"
+
+
+class SkyProcessTracker:
+    """Remembers the Sky PID and revalidates it via pid_exists plus create time.
+
+    Only when the remembered process is gone does it scan /proc/*/comm for an
+    exact name match. exited is set by watch() as soon as Sky goes away.
+    """
+
+    def __init__(self, names=SKY_PROCESS_NAMES):
+        self.names = frozenset(name.lower() for name in names)
+        self.pid = None
+        self._create_time = None
+        self.exited = threading.Event()
+        self._lock = threading.Lock()
+        self._watch_stop = threading.Event()
+        self._watcher = None
+
+    def _alive(self):
+        if self.pid is None:
+            return False
+        try:
+            return psutil.pid_exists(self.pid) and psutil.Process(self.pid).create_time() == self._create_time
+        except psutil.Error:
+            return False
+
+    def _scan(self):
+        try:
+            entries = os.scandir("/proc")
+        except OSError:
+            for p in psutil.process_iter(["name"]):
+                if (p.info["name"] or "").lower() in self.names:
+                    return p.pid
+            return None
+        with entries:
+            for entry in entries:
+                if not entry.name.isdigit():
+                    continue
+                try:
+                    with open(f"/proc/{entry.name}/comm", "rb") as f:
+                        comm = f.read().strip().decode("utf-8", "replace").lower()
+                except OSError:
+                    continue
+                if comm in self.names:
+                    return int(entry.name)
+        return None
+
+    def find(self):
+        with self._lock:
+            if self._alive():
+                return self.pid
+            self.pid = self._create_time = None
+            pid = self._scan()
+            if pid is not None:
+                try:
+                    self._create_time = psutil.Process(pid).create_time()
+                    self.pid = pid
+                except psutil.Error:
+                    pass
+            return self.pid
+
+    def is_running(self):
+        return self.find() is not None
+
+    def watch(self, interval=1.0):
+        """Sets exited once the tracked process disappears, until stop_watch()."""
+        self.stop_watch()
+        self.exited.clear()
+        self._watch_stop.clear()
+
+        def run():
+            while not self._watch_stop.wait(interval):
+                with self._lock:
+                    alive = self._alive()
+                if not alive:
+                    self.exited.set()
+                    return
+
+        self._watcher = threading.Thread(target=run, daemon=True)
+        self._watcher.start()
+
+    def stop_watch(self):
+        self._watch_stop.set()
+        if self._watcher is not None and self._watcher is not threading.current_thread():
+            self._watcher.join(timeout=1.0)
+        self._watcher = None
+
+
+class SkyWindowTracker:
+    """Finds the Sky window over one persistent X connection and caches it.
+
+    The cached window is dropped on DestroyNotify or a title change, and a
+    failed search is only repeated once _NET_CLIENT_LIST changes (or after
+    RESEARCH_INTERVAL). On Wayland the xdotool result is cached per Sky PID.
+    """
+
+    RESEARCH_INTERVAL = 2.0
+
+    def __init__(self, process_tracker=None, title=SKY_WINDOW_TITLE):
+        self.process_tracker = process_tracker
+        self.title = title
+        self._display = None
+        self._window = None
+        self._dirty = True
+        self._searched_at = 0.0
+        self._xdotool_cache = (None, None)
+        self._lock = threading.Lock()
+
+    def find(self):
+        with self._lock:
+            if "WAYLAND_DISPLAY" in os.environ:
+                return self._find_xdotool()
+            if not X11_AVAILABLE:
+                return None
+            try:
+                return self._find_x11()
+            except Exception:
+                self._reset()
+                return None
+
+    def focus(self, window):
+        """Raises and focuses a window returned by find(); the requests are sent right away."""
+        if window is None:
+            return False
+        with self._lock:
+            try:
+                if isinstance(window, str):  # Wayland (xdotool ID)
+                    subprocess.run(
+                        ["xdotool", "windowactivate", window],
+                        stdout=subprocess.DEVNULL,
+                        stderr=subprocess.DEVNULL
+                    )
+                    return True
+                if self._display is None:
+                    return False
+                window.set_input_focus(X.RevertToParent, X.CurrentTime)
+                window.configure(stack_mode=X.Above)
+                # Über die gemeinsame Verbindung - sonst gingen die Requests erst beim nächsten find() raus
+                self._display.sync()
+                return True
+            except Exception:
+                self._reset()
+                return False
+
+    def close(self):
+        with self._lock:
+            self._reset()
+
+    def _reset(self):
+        if self._display is not None:
+            try:
+                self._display.close()
+            except Exception:
+                pass
+        self._display = None
+        self._window = None
+        self._dirty = True
+
+    def _connect(self):
+        if self._display is None:
+            d = display.Display()
+            self._root = d.screen().root
+            self._client_list = d.intern_atom("_NET_CLIENT_LIST")
+            self._net_wm_name = d.intern_atom("_NET_WM_NAME")
+            self._utf8_string = d.intern_atom("UTF8_STRING")
+            self._title_atoms = {self._net_wm_name, Xatom.WM_NAME}
+            self._root.change_attributes(event_mask=X.PropertyChangeMask)
+            d.flush()
+            self._display = d
+        return self._display
+
+    def _drain_events(self):
+        d = self._display
+        while d.pending_events():
+            event = d.next_event()
+            window = self._window
+            if event.type == X.DestroyNotify:
+                if window is not None and event.window.id == window.id:
+                    self._window = None
+                    self._dirty = True
+            elif event.type == X.PropertyNotify:
+                if event.window.id == self._root.id and event.atom == self._client_list:
+                    self._dirty = True
+                elif window is not None and event.window.id == window.id and event.atom in self._title_atoms:
+                    self._window = None
+                    self._dirty = True
+
+    def _window_name(self, window):
+        prop = window.get_full_text_property(self._net_wm_name, self._utf8_string)
+        return prop or window.get_wm_name()
+
+    def _candidates(self):
+        prop = self._root.get_full_property(self._client_list, X.AnyPropertyType)
+        if prop is not None and len(prop.value):
+            return [self._display.create_resource_object("window", wid) for wid in prop.value], True
+        return self._root.query_tree().children, False
+
+    def _find_x11(self):
+        d = self._connect()
+        self._drain_events()
+        if self._window is not None:
+            return self._window
+
+        now = time.monotonic()
+        if not self._dirty and now - self._searched_at < self.RESEARCH_INTERVAL:
+            return None
+        self._searched_at = now
+
+        candidates, ewmh = self._candidates()
+        # Ohne _NET_CLIENT_LIST gibt es kein Änderungs-Event, also jedes Mal suchen
+        self._dirty = not ewmh
+        for window in candidates:
+            try:
+                name = self._window_name(window)
+            except Exception:
+                continue
+            if name and self.title in name:
+                window.change_attributes(event_mask=X.StructureNotifyMask | X.PropertyChangeMask)
+                d.flush()
+                self._window = window
+                return window
+        return None
+
+    def _find_xdotool(self):
+        pid = self.process_tracker.find() if self.process_tracker else None
+        cached_pid, cached_id = self._xdotool_cache
+        if cached_id is not None and pid is not None and pid == cached_pid:
+            return cached_id
+        try:
+            output = subprocess.check_output(
+                ["xdotool", "search", "--name", self.title],
+                stderr=subprocess.DEVNULL
+            ).decode().strip()
+        except Exception:
+            output = ""
+        window_id = output.split()[0] if output else None
+        self._xdotool_cache = (pid, window_id)
+        return window_id
@@ -0,0 +1,136 @@
+# Copyright (C) 2025 VanilleIce
+# This program is licensed under the GNU AGPLv3. See LICENSE for details.
+# Source code: https://github.com/VanilleIce/ProjectLyrica_Linux
+
+import hashlib
+import mmap
+import os
+import struct
+import sys
+import threading
+
+from song_compiler import CompiledSong
+
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "ProjectLyrica", "songs")
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+MAGIC = b"PLSC"
+FORMAT_VERSION = 1
+# magic, version, group count, note count, unmapped, name length, chord table length
+_HEADER = struct.Struct("<4sHIIIII")
+_KEY_SEP = "\x1f"
+_CHORD_SEP = "\x1e"
+
+
+def _align8(n):
+    return (n + 7) & ~7
+
+
+def pack_song(song: CompiledSong) -> bytes:
+    """Fixed-width layout: header, name, chord table, then int64 times and uint32 chord ids."""
+    name = song.name.encode("utf-8")
+    table = _CHORD_SEP.join(_KEY_SEP.join(chord) for chord in song.chords).encode("utf-8")
+    head = _HEADER.pack(MAGIC, FORMAT_VERSION, len(song), song.note_count, song.unmapped,
+                        len(name), len(table)) + name + table
+    times = song.times_ns
+    chord_ids = song.chord_ids
+    if sys.byteorder != "little":
+        times = type(times)("q", times)
+        chord_ids = type(chord_ids)("I", chord_ids)
+        times.byteswap()
+        chord_ids.byteswap()
+    return b"".join((head, b"\0" * (_align8(len(head)) - len(head)),
+                     memoryview(times).cast("B"), memoryview(chord_ids).cast("B")))
+
+
+def unpack_song(buffer) -> CompiledSong:
+    """Zero-copy view over a packed song; times_ns and chord_ids stay backed by buffer."""
+    view = memoryview(buffer)
+    magic, fmt, count, note_count, unmapped, name_len, table_len = _HEADER.unpack_from(view)
+    if magic != MAGIC or fmt != FORMAT_VERSION:
+        raise ValueError("unsupported song cache entry")
+    offset = _HEADER.size
+    name = bytes(view[offset:offset + name_len]).decode("utf-8")
+    offset += name_len
+    table = bytes(view[offset:offset + table_len]).decode("utf-8")
+    offset = _align8(offset + table_len)
+    chords = tuple(tuple(chord.split(_KEY_SEP)) if chord else ()
+                   for chord in table.split(_CHORD_SEP)) if count else ()
+    times = view[offset:offset + 8 * count].cast("q")
+    offset += 8 * count
+    chord_ids = view[offset:offset + 4 * count].cast("I")
+    if len(chord_ids) != count:
+        raise ValueError("truncated song cache entry")
+    if sys.byteorder != "little":
+        from array import array
+        times = array("q", times)
+        chord_ids = array("I", chord_ids)
+        times.byteswap()
+        chord_ids.byteswap()
+    return CompiledSong(name, times, chord_ids, chords, note_count, unmapped)
+
+
+class SongCache:
+    """Compiled songs on disk, memory-mapped on hit, evicted oldest-first by total size."""
+
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def cache_key(path, stamp, key_map):
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(os.path.abspath(path).encode("utf-8", "surrogateescape"))
+        digest.update(repr(stamp).encode())
+        digest.update(repr(sorted(key_map.items())).encode("utf-8"))
+        return digest.hexdigest()
+
+    def _entry(self, key):
+        return os.path.join(self.cache_dir, key + ".bin")
+
+    def get(self, key):
+        entry = self._entry(key)
+        try:
+            with open(entry, "rb") as f:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            song = unpack_song(buffer)
+        except (OSError, ValueError, struct.error):
+            return None
+        try:
+            os.utime(entry)
+        except OSError:
+            pass
+        return song
+
+    def put(self, key, song):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        entry = self._entry(key)
+        tmp = f"{entry}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(pack_song(song))
+        os.replace(tmp, entry)
+        self.evict()
+
+    def evict(self):
+        with self._lock:
+            try:
+                entries = []
+                with os.scandir(self.cache_dir) as it:
+                    for entry in it:
+                        if entry.name.endswith(".bin"):
+                            stat = entry.stat()
+                            entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+            except OSError:
+                return
+            total = sum(size for _, size, _ in entries)
+            entries.sort()
+            # Neuester Eintrag bleibt immer erhalten
+            for _, size, path in entries[:-1]:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                except OSError:
+                    pass
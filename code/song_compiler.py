@@ -0,0 +1,101 @@
+# Copyright (C) 2025 VanilleIce
+# This program is licensed under the GNU AGPLv3. See LICENSE for details.
+# Source code: https://github.com/VanilleIce/ProjectLyrica_Linux
+
+import json
+from array import array
+from bisect import bisect_left
+
+NS_PER_MS = 1_000_000
+
+
+def decode_sheet(raw: bytes) -> dict:
+    """Decodes a sheet file (UTF-8 or UTF-16 with BOM) into its song dict."""
+    if raw[:2] in (b"\xff\xfe", b"\xfe\xff"):
+        text = raw.decode("utf-16")
+    else:
+        text = raw.decode("utf-8-sig")
+    data = json.loads(text)
+    return data[0] if isinstance(data, list) else data
+
+
+class CompiledSong:
+    """Packed note schedule - one entry per chord (notes sharing a timestamp).
+
+    times_ns[i]   absolute song time of chord i in ns (at speed 1000)
+    chord_ids[i]  index into chords
+    chords        interned tuples of resolved keys, shared between equal chords
+    """
+
+    __slots__ = ("name", "times_ns", "chord_ids", "chords", "note_count", "unmapped")
+
+    def __init__(self, name, times_ns, chord_ids, chords, note_count, unmapped):
+        self.name = name
+        self.times_ns = times_ns
+        self.chord_ids = chord_ids
+        self.chords = chords
+        self.note_count = note_count
+        self.unmapped = unmapped
+
+    def __len__(self):
+        return len(self.times_ns)
+
+    @property
+    def duration_ns(self):
+        return self.times_ns[-1] - self.times_ns[0] if self.times_ns else 0
+
+    def index_at(self, song_ns):
+        """Index of the first chord at or after song_ns - binary search, O(log n)."""
+        return bisect_left(self.times_ns, song_ns)
+
+
+def compile_song(song_data: dict, key_map: dict) -> CompiledSong:
+    """Resolves songNotes against key_map and groups them into chords."""
+    notes = song_data.get("songNotes") or []
+
+    resolved = []
+    unmapped = 0
+    for order, note in enumerate(notes):
+        try:
+            key = key_map.get(str(note["key"]).lower())
+            note_time = int(note["time"])
+        except (KeyError, TypeError, ValueError):
+            key = None
+        if key is None:
+            unmapped += 1
+            continue
+        resolved.append((note_time, order, key))
+
+    # Stabil nach Zeit sortieren - manche Sheets sind nicht monoton
+    resolved.sort()
+
+    times_ns = array("q")
+    chord_ids = array("I")
+    chord_table = {}
+    current_time = None
+    current_keys = []
+
+    def flush():
+        chord = tuple(dict.fromkeys(current_keys))
+        chord_id = chord_table.setdefault(chord, len(chord_table))
+        times_ns.append(current_time * NS_PER_MS)
+        chord_ids.append(chord_id)
+
+    for note_time, _, key in resolved:
+        if note_time != current_time and current_keys:
+            flush()
+            current_keys = []
+        current_time = note_time
+        current_keys.append(key)
+    if current_keys:
+        flush()
+
+    chords = tuple(chord_table)
+    return CompiledSong(
+        song_data.get("name", ""),
+        times_ns,
+        chord_ids,
+        chords,
+        len(resolved),
+        unmapped,
+    )
@@ -0,0 +1,148 @@
+# Copyright (C) 2025 VanilleIce
+# This program is licensed under the GNU AGPLv3. See LICENSE for details.
+# Source code: https://github.com/VanilleIce/ProjectLyrica_Linux
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import zipfile
+
+from song_compiler import decode_sheet
+from song_loader import SongLoader, SONG_SUFFIXES, ARCHIVE_SUFFIX
+
+LIBRARY_DB = os.path.join(os.path.expanduser("~"), ".config", "ProjectLyrica", "library.sqlite3")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS songs (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    name TEXT,
+    author TEXT,
+    transcribed_by TEXT,
+    bpm INTEGER,
+    pitch_level INTEGER,
+    note_count INTEGER,
+    duration_ms INTEGER,
+    is_encrypted INTEGER,
+    content_hash TEXT,
+    error TEXT
+)
+"""
+
+_COLUMNS = ("path", "mtime_ns", "size", "name", "author", "transcribed_by", "bpm",
+            "pitch_level", "note_count", "duration_ms", "is_encrypted", "content_hash", "error")
+
+
+def sheet_metadata(raw: bytes) -> dict:
+    """Header fields and note statistics of one sheet, or an "error" entry."""
+    meta = {"content_hash": hashlib.blake2b(raw, digest_size=16).hexdigest()}
+    try:
+        song = decode_sheet(raw)
+        notes = song.get("songNotes") or []
+        times = [note["time"] for note in notes if isinstance(note, dict) and "time" in note]
+        meta.update(
+            name=str(song.get("name") or ""),
+            author=str(song.get("author") or ""),
+            transcribed_by=str(song.get("transcribedBy") or ""),
+            bpm=song.get("bpm"),
+            pitch_level=song.get("pitchLevel"),
+            note_count=len(notes),
+            duration_ms=int(max(times) - min(times)) if times else 0,
+            is_encrypted=int(bool(song.get("isEncrypted"))),
+        )
+    except Exception as e:
+        meta["error"] = str(e) or type(e).__name__
+    return meta
+
+
+class SongLibrary:
+    """Persistent index over the song folder, refreshed by mtime and size."""
+
+    def __init__(self, db_path=LIBRARY_DB, loader=None):
+        self.loader = loader or SongLoader()
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute(_SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _scan(self, root):
+        """Yields (path, mtime_ns, size, read) for every sheet, including zip members."""
+        for dirpath, _, filenames in os.walk(root):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                lower = filename.lower()
+                if lower.endswith(SONG_SUFFIXES):
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    yield path, stat.st_mtime_ns, stat.st_size, lambda p=path: self.loader.read(p)[0]
+                elif lower.endswith(ARCHIVE_SUFFIX):
+                    try:
+                        members = self.loader.members(path)
+                    except (OSError, zipfile.BadZipFile):
+                        continue
+                    for info in members:
+                        member_path = os.path.join(path, info.filename)
+                        mtime_ns = int(time.mktime(info.date_time + (0, 0, -1))) * 1_000_000_000
+                        yield (member_path, mtime_ns, info.file_size,
+                               lambda p=member_path: self.loader.read(p)[0])
+
+    def refresh(self, root):
+        """Re-parses only new or changed sheets below root. Returns (updated, removed)."""
+        root = os.path.abspath(root)
+        prefix = os.path.join(root, "")
+        with self._lock:
+            known = {row[0]: (row[1], row[2]) for row in self._conn.execute(
+                "SELECT path, mtime_ns, size FROM songs WHERE path LIKE ? ESCAPE '\\'",
+                (_like_prefix(prefix),))}
+
+        rows = []
+        seen = set()
+        for path, mtime_ns, size, read in self._scan(root):
+            seen.add(path)
+            if known.get(path) == (mtime_ns, size):
+                continue
+            try:
+                meta = sheet_metadata(read())
+            except (OSError, KeyError, zipfile.BadZipFile) as e:
+                meta = {"error": str(e)}
+            meta.update(path=path, mtime_ns=mtime_ns, size=size)
+            rows.append(tuple(meta.get(column) for column in _COLUMNS))
+
+        removed = [(path,) for path in known if path not in seen]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO songs ({', '.join(_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(_COLUMNS))})", rows)
+            self._conn.executemany("DELETE FROM songs WHERE path = ?", removed)
+        return len(rows), len(removed)
+
+    def songs(self, root=None):
+        query = "SELECT * FROM songs WHERE error IS NULL"
+        params = ()
+        if root is not None:
+            query += " AND path LIKE ? ESCAPE '\\'"
+            params = (_like_prefix(os.path.join(os.path.abspath(root), "")),)
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(query + " ORDER BY name COLLATE NOCASE", params)]
+
+    def get(self, path):
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM songs WHERE path = ?", (path,)).fetchone()
+        return dict(row) if row else None
+
+
+def _like_prefix(prefix):
+    escaped = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return escaped + "%"
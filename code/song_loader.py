@@ -0,0 +1,121 @@
+# Copyright (C) 2025 VanilleIce
+# This program is licensed under the GNU AGPLv3. See LICENSE for details.
+# Source code: https://github.com/VanilleIce/ProjectLyrica_Linux
+
+import os
+import threading
+import zipfile
+from collections import OrderedDict
+from pathlib import Path, PurePosixPath
+
+from song_compiler import decode_sheet
+
+SONG_SUFFIXES = (".json", ".txt", ".skysheet")
+ARCHIVE_SUFFIX = ".zip"
+DEFAULT_CACHE_BYTES = 32 * 1024 * 1024
+
+
+def split_archive_path(path):
+    """Splits ".../Songs.zip/dir/song.skysheet" into (archive, member).
+
+    Returns (None, None) for plain filesystem paths.
+    """
+    parts = Path(path).parts
+    for i, part in enumerate(parts[:-1]):
+        if part.lower().endswith(ARCHIVE_SUFFIX):
+            archive = Path(*parts[:i + 1])
+            if archive.is_file():
+                return archive, "/".join(parts[i + 1:])
+    return None, None
+
+
+def is_safe_member(member: str) -> bool:
+    path = PurePosixPath(member)
+    return bool(member) and not path.is_absolute() and ".." not in path.parts
+
+
+class SongLoader:
+    """Reads sheets from files or zip members, with a size-bounded LRU of parsed songs.
+
+    Archives stay open with their central directory parsed once; a member is
+    only decompressed when it is requested.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._cache = OrderedDict()
+        self._cache_bytes = 0
+        self._archives = {}
+        self._lock = threading.Lock()
+
+    def _archive(self, archive):
+        key = os.path.abspath(archive)
+        stat = os.stat(key)
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        entry = self._archives.get(key)
+        if entry is None or entry[0] != stamp:
+            if entry is not None:
+                entry[1].close()
+            entry = self._archives[key] = (stamp, zipfile.ZipFile(key))
+        return entry
+
+    def read(self, path):
+        """Raw bytes plus a version stamp that changes whenever the content may have."""
+        archive, member = split_archive_path(path)
+        if archive is None:
+            with open(path, "rb") as f:
+                stat = os.fstat(f.fileno())
+                return f.read(), (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            stamp, zf = self._archive(archive)
+            info = zf.getinfo(member)
+            return zf.read(info), stamp + (info.CRC,)
+
+    def stamp(self, path):
+        """Version stamp of a sheet without reading it (mtime/size, plus CRC for zip members)."""
+        archive, member = split_archive_path(path)
+        if archive is None:
+            stat = os.stat(path)
+            return (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            stamp, zf = self._archive(archive)
+            return stamp + (zf.getinfo(member).CRC,)
+
+    def members(self, archive):
+        """ZipInfo entries of all song files in an archive."""
+        with self._lock:
+            _, zf = self._archive(archive)
+            return [info for info in zf.infolist()
+                    if not info.is_dir() and info.filename.lower().endswith(SONG_SUFFIXES)]
+
+    def load(self, path):
+        key = os.path.abspath(path)
+        stamp = self.stamp(path)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None and cached[0] == stamp:
+                self._cache.move_to_end(key)
+                return cached[2]
+
+        raw, stamp = self.read(path)
+        song = decode_sheet(raw)
+
+        with self._lock:
+            old = self._cache.pop(key, None)
+            if old is not None:
+                self._cache_bytes -= old[1]
+            if len(raw) <= self.max_bytes:
+                self._cache[key] = (stamp, len(raw), song)
+                self._cache_bytes += len(raw)
+                while self._cache_bytes > self.max_bytes:
+                    _, (_, size, _) = self._cache.popitem(last=False)
+                    self._cache_bytes -= size
+        return song
+
+    def close(self):
+        with self._lock:
+            for _, zf in self._archives.values():
+                zf.close()
+            self._archives.clear()
+            self._cache.clear()
+            self._cache_bytes = 0
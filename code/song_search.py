@@ -0,0 +1,149 @@
+# Copyright (C) 2025 VanilleIce
+# This program is licensed under the GNU AGPLv3. See LICENSE for details.
+# Source code: https://github.com/VanilleIce/ProjectLyrica_Linux
+
+import heapq
+import re
+import unicodedata
+from collections import Counter
+from pathlib import PurePath
+
+# Dateinamen wie "h#U00fcbsch" enthalten escapte Zeichen
+_ESCAPE_RE = re.compile(r"#U([0-9a-fA-F]{4})")
+_SEPARATOR_RE = re.compile(r"[\W_]+")
+FUZZY_THRESHOLD = 0.6
+
+
+def unescape_name(text: str) -> str:
+    return _ESCAPE_RE.sub(lambda m: chr(int(m.group(1), 16)), text)
+
+
+def normalize(text: str) -> str:
+    """Casefolded, accent-free, single-spaced text - the form both index and queries use."""
+    text = unicodedata.normalize("NFKD", unescape_name(text or "").casefold())
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return _SEPARATOR_RE.sub(" ", text).strip()
+
+
+def trigrams(text: str):
+    padded = f" {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SongIndex:
+    """In-memory trigram index over name, author and transcriber of library rows.
+
+    search() first intersects the postings of every query word (all words must
+    appear). If that finds too little, it falls back to counting trigram hits,
+    which tolerates typos.
+    """
+
+    def __init__(self, rows=()):
+        self.songs = []
+        self._texts = []
+        self._names = []
+        self._postings = {}
+        for row in rows:
+            self.add(row)
+
+    def __len__(self):
+        return len(self.songs)
+
+    def add(self, row):
+        path = row["path"]
+        name = row.get("name") or unescape_name(PurePath(path).stem)
+        song = {
+            "path": path,
+            "name": name,
+            "author": row.get("author") or "",
+            "transcribed_by": row.get("transcribed_by") or "",
+        }
+        doc_id = len(self.songs)
+        self.songs.append(song)
+        name_text = normalize(name)
+        text = " ".join(filter(None, (name_text, normalize(song["author"]), normalize(song["transcribed_by"]))))
+        self._names.append(name_text)
+        self._texts.append(text)
+        postings = self._postings
+        for gram in trigrams(text):
+            bucket = postings.get(gram)
+            if bucket is None:
+                postings[gram] = {doc_id}
+            else:
+                bucket.add(doc_id)
+
+    def _ranked(self, ids, query, words, limit):
+        """Best limit ids: name starts with query, name contains it, name contains all words, rest."""
+        names = self._names
+        tiers = ([], [], [], [])
+        multi = len(words) > 1
+        for i in ids:
+            name = names[i]
+            if name.startswith(query):
+                tiers[0].append(i)
+            elif query in name:
+                tiers[1].append(i)
+            elif multi and all(word in name for word in words):
+                tiers[2].append(i)
+            else:
+                tiers[3].append(i)
+
+        def key(i):
+            return (len(names[i]), names[i])
+
+        ranked = []
+        for tier in tiers:
+            need = limit - len(ranked)
+            if need <= 0:
+                break
+            # Nur so viel sortieren wie angezeigt wird
+            ranked.extend(heapq.nsmallest(need, tier, key=key) if len(tier) > need else sorted(tier, key=key))
+        return ranked
+
+    def search(self, query, limit=200):
+        """Songs matching query, best first. An empty query lists everything by name."""
+        query = normalize(query)
+        if not query:
+            order = sorted(range(len(self.songs)), key=self._names.__getitem__)
+            return [self.songs[i] for i in order[:limit]]
+
+        words = query.split()
+        texts = self._texts
+        postings = self._postings
+
+        # Exakt: jedes Wort muss als Teilstring vorkommen
+        candidates = None
+        for word in words:
+            if len(word) < 3:
+                continue
+            sets = sorted((postings.get(word[i:i + 3], set()) for i in range(len(word) - 2)), key=len)
+            if not sets or not sets[0]:
+                candidates = set()
+                break
+            matched = sets[0].intersection(*sets[1:])
+            candidates = matched if candidates is None else candidates & matched
+            if not candidates:
+                break
+        hits = range(len(self.songs)) if candidates is None else candidates
+        for word in words:
+            hits = [i for i in hits if word in texts[i]]
+        ranked = self._ranked(hits, query, words, limit)
+
+        if len(ranked) < limit and len(query) >= 3:
+            # Unscharf: Anteil der getroffenen Trigramme, nur wenn exakt zu wenig gefunden wurde
+            grams = trigrams(query)
+            counts = Counter()
+            for gram in grams:
+                bucket = postings.get(gram)
+                if bucket:
+                    counts.update(bucket)
+            needed = FUZZY_THRESHOLD * len(grams)
+            found = set(hits)
+            names = self._names
+            fuzzy = heapq.nsmallest(
+                limit - len(ranked),
+                (i for i, count in counts.items() if count >= needed and i not in found),
+                key=lambda i: (-counts[i], len(names[i]), names[i]))
+            ranked.extend(fuzzy)
+
+        return [self.songs[i] for i in ranked[:limit]]
@@ -0,0 +1,293 @@
+# Copyright (C) 2025 VanilleIce
+# This program is licensed under the GNU AGPLv3. See LICENSE for details.
+# Source code: https://github.com/VanilleIce/ProjectLyrica_Linux
+
+"""Headless timing benchmark for MusicPlayer.play_song.
+
+Runs sheets from Songs.zip through the real playback loop with a recording
+keyboard backend and reports how closely the presses follow the sheet:
+
+    python3 code/timing_benchmark.py --limit 5 --speeds 800,1000 --json out.json
+    python3 code/timing_benchmark.py --virtual --limit 0
+    python3 code/timing_benchmark.py --load 2 --performance
+
+--virtual replaces the clock and all sleeps with a simulated clock, so a whole
+corpus runs in seconds; lateness is then only the scheduler arithmetic.
+--load starts threads that churn reference cycles like a busy GUI would, and
+--performance plays with MusicPlayer.performance_mode enabled.
+No display, input device or running game is needed.
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import types
+from array import array
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import playback
+import player as player_module
+from playback import KeyReleaseScheduler, PlaybackState
+from player import MusicPlayer
+from song_compiler import CompiledSong
+from song_loader import SongLoader
+
+DEFAULT_ARCHIVE = os.path.join("resources", "Songs", "Songs.zip")
+
+
+class RecordingBackend:
+    """Stands in for the keyboard Controller and timestamps every key event."""
+
+    name = "recording"
+
+    def __init__(self, clock_ns=time.perf_counter_ns):
+        self.clock_ns = clock_ns
+        self.presses = []
+        self.releases = []
+
+    def set_mapping(self, key_mapping):
+        pass
+
+    def press_keys(self, keys):
+        now = self.clock_ns
+        self.presses.append([now() for _ in keys])
+
+    def release_keys(self, keys):
+        now = self.clock_ns
+        self.releases.extend(now() for _ in keys)
+
+
+class VirtualClock:
+    def __init__(self):
+        self.now = 0
+
+    def monotonic_ns(self):
+        return self.now
+
+    def monotonic(self):
+        return self.now / 1e9
+
+    def sleep(self, seconds):
+        self.now += max(0, int(seconds * 1e9))
+
+
+class VirtualState(PlaybackState):
+    def __init__(self, clock):
+        super().__init__()
+        self.clock = clock
+
+    def wait(self, timeout=None):
+        if self.paused or self.stopped:
+            return True
+        if timeout is not None:
+            self.clock.sleep(timeout)
+        return self.paused or self.stopped
+
+    def wait_resumed(self):
+        return not self.stopped
+
+
+class VirtualReleaser:
+    def __init__(self, backend):
+        self.backend = backend
+
+    def press(self, keys, hold_ns):
+        self.backend.press_keys(keys)
+
+    def release_all(self):
+        pass
+
+
+class _SkyStub:
+    """Pretends Sky is running so play_song can be driven without the game."""
+
+    def __init__(self):
+        self.exited = threading.Event()
+
+    def is_running(self):
+        return True
+
+    def watch(self, interval=1.0):
+        pass
+
+    def stop_watch(self):
+        pass
+
+
+def _churn(stop):
+    """Background load: allocates reference cycles so the cyclic GC keeps running."""
+    while not stop.is_set():
+        nodes = [{} for _ in range(500)]
+        for a, b in zip(nodes, nodes[1:]):
+            a["next"] = b
+            b["prev"] = a
+        time.sleep(0.001)
+
+
+def truncate(song, max_seconds):
+    if not max_seconds or not len(song):
+        return song
+    limit = song.times_ns[0] + int(max_seconds * 1e9)
+    count = sum(1 for t in song.times_ns if t <= limit)
+    times = array("q", song.times_ns[:count])
+    chord_ids = array("I", song.chord_ids[:count])
+    notes = sum(len(song.chords[c]) for c in chord_ids)
+    return CompiledSong(song.name, times, chord_ids, song.chords, notes, song.unmapped)
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(q / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def run_song(player, song, speed, virtual):
+    clock = VirtualClock() if virtual else None
+    backend = RecordingBackend(clock.monotonic_ns if clock else time.perf_counter_ns)
+    player.backend = backend
+    player.sky_process = _SkyStub()
+    player.ramp_time_ns = 0
+    player.set_speed(speed)
+
+    if virtual:
+        player.releaser = VirtualReleaser(backend)
+        player.state = VirtualState(clock)
+        player.spin_threshold_ns = 0
+        fake_time = types.SimpleNamespace(
+            monotonic_ns=clock.monotonic_ns, monotonic=clock.monotonic,
+            sleep=clock.sleep, perf_counter=time.perf_counter)
+        saved = (playback.time, player_module.time)
+        playback.time = player_module.time = fake_time
+    else:
+        player.releaser = KeyReleaseScheduler(backend.press_keys, backend.release_keys)
+        player.state = PlaybackState()
+
+    cpu_start = time.process_time_ns()
+    try:
+        player.play_song(song)
+    finally:
+        if virtual:
+            playback.time, player_module.time = saved
+        else:
+            player.releaser.release_all()
+    cpu_ns = time.process_time_ns() - cpu_start
+
+    presses = backend.presses
+    if not presses:
+        return None
+    origin_song = song.times_ns[0]
+    origin_wall = presses[0][0]
+    lateness = []
+    spreads = []
+    for i, stamps in enumerate(presses):
+        expected = origin_wall + (song.times_ns[i] - origin_song) * 1000 / speed
+        lateness.append((stamps[0] - expected) / 1e6)
+        spreads.append((stamps[-1] - stamps[0]) / 1e6)
+    ordered = sorted(lateness)
+    return {
+        "name": song.name,
+        "speed": speed,
+        "chords": len(presses),
+        "notes": sum(len(stamps) for stamps in presses),
+        "lateness_ms": {
+            "p50": percentile(ordered, 50),
+            "p90": percentile(ordered, 90),
+            "p99": percentile(ordered, 99),
+            "max": ordered[-1],
+        },
+        "drift_ms": lateness[-1] - lateness[0],
+        "chord_spread_max_ms": max(spreads),
+        "cpu_us_per_note": cpu_ns / 1e3 / max(1, sum(len(stamps) for stamps in presses)),
+    }
+
+
+def summarize(results):
+    by_speed = {}
+    for result in results:
+        by_speed.setdefault(result["speed"], []).append(result)
+    summary = {}
+    for speed, rows in sorted(by_speed.items()):
+        p99 = sorted(row["lateness_ms"]["p99"] for row in rows)
+        summary[str(speed)] = {
+            "songs": len(rows),
+            "notes": sum(row["notes"] for row in rows),
+            "worst_p99_ms": p99[-1],
+            "median_p99_ms": percentile(p99, 50),
+            "worst_abs_drift_ms": max(abs(row["drift_ms"]) for row in rows),
+            "worst_chord_spread_ms": max(row["chord_spread_max_ms"] for row in rows),
+            "mean_cpu_us_per_note": sum(row["cpu_us_per_note"] for row in rows) / len(rows),
+        }
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless playback timing benchmark")
+    parser.add_argument("archive", nargs="?", default=DEFAULT_ARCHIVE, help="song zip or directory")
+    parser.add_argument("--speeds", default="1000", help="comma separated speeds (1000 = normal)")
+    parser.add_argument("--limit", type=int, default=3, help="number of songs, 0 for all")
+    parser.add_argument("--max-seconds", type=float, default=20.0, help="truncate songs, 0 for full length")
+    parser.add_argument("--virtual", action="store_true", help="simulate time instead of sleeping")
+    parser.add_argument("--load", type=int, default=0, help="background threads churning garbage")
+    parser.add_argument("--performance", action="store_true", help="enable performance mode")
+    parser.add_argument("--json", dest="json_path", help="write results to this file")
+    args = parser.parse_args(argv)
+
+    loader = SongLoader()
+    if os.path.isdir(args.archive):
+        from song_library import SongLibrary
+        library = SongLibrary(":memory:", loader)
+        library.refresh(args.archive)
+        paths = [row["path"] for row in sorted(library.songs(), key=lambda row: row["path"])]
+    else:
+        paths = [os.path.join(args.archive, info.filename)
+                 for info in sorted(loader.members(args.archive), key=lambda info: info.filename)]
+    if args.limit:
+        paths = paths[:args.limit]
+
+    player = MusicPlayer(backend=RecordingBackend())
+    player.performance_mode = args.performance
+    stop_load = threading.Event()
+    for _ in range(args.load):
+        threading.Thread(target=_churn, args=(stop_load,), daemon=True).start()
+    speeds = [int(speed) for speed in args.speeds.split(",") if speed]
+    results = []
+    for path in paths:
+        try:
+            song = truncate(player.compile_song(loader.load(path)), args.max_seconds)
+        except Exception as e:
+            print(f"skip {Path(path).name}: {e}", file=sys.stderr)
+            continue
+        for speed in speeds:
+            result = run_song(player, song, speed, args.virtual)
+            if result is None:
+                continue
+            result["path"] = path
+            results.append(result)
+            print(f"{speed:>5} p99 {result['lateness_ms']['p99']:7.3f} ms  drift {result['drift_ms']:7.3f} ms  "
+                  f"{result['cpu_us_per_note']:6.1f} us/note  {Path(path).name}", flush=True)
+
+    stop_load.set()
+
+    report = {
+        "version": player_module.version,
+        "virtual": args.virtual,
+        "load": args.load,
+        "performance": player.performance_applied,
+        "summary": summarize(results),
+        "songs": results,
+    }
+    print(json.dumps(report["summary"], indent=2))
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
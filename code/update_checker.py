@@ -2,49 +2,89 @@
 # This program is licensed under the GNU AGPLv3. See LICENSE for details.
 # Source code: https://github.com/VanilleIce/ProjectLyrica_Linux
 
-import requests
 import re
 import json
-import platform
-import subprocess
+import os
+import time
+import threading
 
-def check_connection():
+API_BASE = os.environ.get("PROJECTLYRICA_UPDATE_API", "https://api.github.com")
+CACHE_FILE = os.path.join(os.path.expanduser("~"), ".cache", "ProjectLyrica", "update.json")
+CACHE_TTL = 6 * 60 * 60
+
+def _load_cache(cache_file):
+    try:
+        with open(cache_file, 'r', encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _save_cache(cache_file, data):
     try:
-        return subprocess.call(
-            ["ping", "-c", "1", "api.github.com"],
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL
-        ) == 0
-    except:
-        return False
-
-def check_update(current_version: str, repo: str):
-    """Prüft auf Updates - Rückgabe: (status, latest_version, url)"""
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+        with open(tmp_file, 'w', encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_file, cache_file)
+    except OSError:
+        pass
+
+def _result(current_version, latest, url):
+    if not latest:
+        return ("error", "", "")
+    if version_tuple(latest) > version_tuple(current_version):
+        return ("update", latest, url)
+    return ("current", latest, url)
+
+def check_update(current_version: str, repo: str, cache_file=CACHE_FILE, ttl=CACHE_TTL, api_base=None):
+    """Prüft auf Updates - Rückgabe: (status, latest_version, url)
+
+    Innerhalb der TTL wird nur der Cache gelesen, danach per ETag nachgefragt.
+    """
+    cache = _load_cache(cache_file)
+    if cache.get("repo") != repo:
+        cache = {}
+    if cache and time.time() - cache.get("checked_at", 0) < ttl:
+        return _result(current_version, cache.get("latest", ""), cache.get("url", ""))
+
+    # requests erst hier laden - kostet beim Start sonst spürbar Zeit
+    import requests
+
+    headers = {"User-Agent": "ProjectLyrica_Linux/UpdateChecker"}
+    if cache.get("etag"):
+        headers["If-None-Match"] = cache["etag"]
+
     try:
-        if not check_connection():
-            return ("no_connection", "", "")
-        
         response = requests.get(
-            f"https://api.github.com/repos/{repo}/releases/latest",
+            f"{api_base or API_BASE}/repos/{repo}/releases/latest",
             timeout=(3, 5),
-            headers={"User-Agent": "ProjectLyrica_Linux/UpdateChecker"},
+            headers=headers,
             verify=True
         )
 
+        if response.status_code == 304 and cache:
+            cache["checked_at"] = time.time()
+            _save_cache(cache_file, cache)
+            return _result(current_version, cache.get("latest", ""), cache.get("url", ""))
+
         response.raise_for_status()
-        
+
         data = response.json()
         latest = data.get('tag_name', '')
         url = data.get('html_url', '')
-        
-        if not latest:
-            return ("error", "", "")
-        
-        if version_tuple(latest) > version_tuple(current_version):
-            return ("update", latest, url)
-        else:
-            return ("current", latest, url)
-            
+
+        if latest:
+            _save_cache(cache_file, {
+                "repo": repo,
+                "checked_at": time.time(),
+                "etag": response.headers.get("ETag", ""),
+                "latest": latest,
+                "url": url
+            })
+        return _result(current_version, latest, url)
+
+    except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+        return ("no_connection", "", "")
     except requests.exceptions.RequestException:
         return ("error", "", "")
     except json.JSONDecodeError:
@@ -52,6 +92,19 @@ def check_update(current_version: str, repo: str):
     except Exception:
         return ("error", "", "")
 
+def check_update_async(current_version: str, repo: str, callback, **kwargs):
+    """Führt check_update in einem Hintergrund-Thread aus und ruft callback(result) auf."""
+    def run():
+        try:
+            result = check_update(current_version, repo, **kwargs)
+        except Exception:
+            result = ("error", "", "")
+        callback(result)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
+
 def version_tuple(v: str):
     cleaned = re.sub(r'[^0-9.]', '', v)
     parts = cleaned.split('.')
@@ -19,7 +19,7 @@ cat <<EOF | sudo tee /usr/share/applications/project-lyrica.desktop
 [Desktop Entry]
 Name=Project Lyrica
 Comment=Music player for Sky: Children of the Light
-Exec=$APP_DIR/ProjectLyrica.sh
+Exec=$APP_DIR/ProjectLyrica.sh %F
 Icon=$APP_DIR/resources/icons/icon.png
 Terminal=false
 Type=Application
@@ -1,3 +1,11 @@
 #!/bin/bash
+# Relative Dateipfade gelten für das Aufrufverzeichnis, nicht für den App-Ordner
+args=()
+for arg in "$@"; do
+    case "$arg" in
+        /*) args+=("$arg") ;;
+        *) args+=("$PWD/$arg") ;;
+    esac
+done
 cd "$(dirname "$0")"
-python3 code/ProjectLyrica.py
\ No newline at end of file
+python3 code/ProjectLyrica.py "${args[@]}"